@@ -1,12 +1,24 @@
 # scripts/adv.py
 # Fetch ADV (average daily volume) via Yahoo Finance CSV download for ASX codes.
+# Daily volumes are cached in data/adv_cache.parquet so each run only pulls the days since the last one.
 
-import time
+import os
 import io
+import concurrent.futures as cf
 from datetime import datetime, timedelta
 import requests
 import pandas as pd
 
+ADV_CACHE = "data/adv_cache.parquet"
+_CACHE_COLS = ["Code", "Date", "Volume"]
+# Calendar days of volumes kept in the cache, independent of the ADV window: a wider window is served
+# from what is already cached, and codes that drop out of the feed age out by date.
+ADV_CACHE_DAYS = 120
+
+# Pooled keep-alive session shared by the download workers (one TLS handshake per connection, not per code)
+_SESSION = requests.Session()
+_SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=8))
+
 def _yf_symbol(code: str) -> str:
     code = str(code).strip().upper()
     return f"{code}.AX"
@@ -19,27 +31,79 @@ def _yf_download_csv(symbol: str, lookback_days: int = 120) -> pd.DataFrame:
         f"https://query1.finance.yahoo.com/v7/finance/download/{symbol}"
         f"?period1={period1}&period2={period2}&interval=1d&events=history&includeAdjustedClose=true"
     )
-    r = requests.get(url, timeout=30)
+    r = _SESSION.get(url, timeout=30)
     r.raise_for_status()
-    return pd.read_csv(io.StringIO(r.text))
-
-def fetch_adv(codes, window_days: int = 30, sleep_sec: float = 1.0) -> pd.DataFrame:
-    """Return DataFrame: Code, ADV (shares/day). Missing symbols are skipped."""
-    out = []
-    seen = set()
-    for code in codes:
-        c = str(code).strip().upper()
-        if not c or c in seen: continue
-        seen.add(c)
-        sym = _yf_symbol(c)
+    # Only Date/Volume are used; parse straight from the raw bytes
+    return pd.read_csv(io.BytesIO(r.content), usecols=["Date","Volume"],
+                       dtype={"Volume": "float64"}, na_values=["null"])
+
+def _read_adv_cache(path: str = ADV_CACHE) -> pd.DataFrame:
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=_CACHE_COLS)
+    try:
+        df = pd.read_parquet(path)  # typed on disk: Code/Date strings, Volume float64
+        if set(_CACHE_COLS).issubset(df.columns):
+            return df[_CACHE_COLS]
+    except Exception:
+        pass
+    return pd.DataFrame(columns=_CACHE_COLS)
+
+def _write_adv_cache(df: pd.DataFrame, path: str = ADV_CACHE) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    df.to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+
+def _volumes_since(code: str, last_date, lookback_days: int = ADV_CACHE_DAYS):
+    """Download daily volumes for code; only from last_date onwards when we have a cached tail
+    (last_date None => full lookback, e.g. a new code or one whose cache is too short)."""
+    if last_date is not None:
+        lookback_days = min(lookback_days, max(1, (datetime.utcnow() - pd.Timestamp(last_date)).days + 1))
+    try:
+        df = _yf_download_csv(_yf_symbol(code), lookback_days=lookback_days)
+    except Exception:
+        return None
+    out = pd.DataFrame({"Code": code, "Date": df["Date"].astype(str), "Volume": df["Volume"]})
+    return out[out["Volume"].notna()]
+
+def fetch_adv(codes, window_days: int = 30, max_workers: int = 8) -> pd.DataFrame:
+    """Return DataFrame: Code, ADV (shares/day). Missing symbols are skipped.
+
+    Downloads run in parallel (IO-bound), same pattern as build_static_sectors_fast --yahoo.
+    """
+    uniq = list(dict.fromkeys(c for c in (str(x).strip().upper() for x in codes) if c))
+    if not uniq:
+        return pd.DataFrame(columns=["Code","ADV"])
+
+    lookback = max(ADV_CACHE_DAYS, 2 * window_days)  # calendar days; ~1.4 per trading day
+    cutoff = (datetime.utcnow() - timedelta(days=lookback)).strftime("%Y-%m-%d")
+    cache = _read_adv_cache()
+    n_cached = len(cache)
+    cache = cache[cache["Date"].astype(str) >= cutoff]  # ISO dates compare as strings
+    last = {}
+    if not cache.empty:
+        g = cache.groupby("Code")["Date"]
+        span = pd.DataFrame({"first": g.min(), "last": g.max(), "n": g.size()})
+        # Incremental only where the cache already covers the window (or reaches back to the cutoff,
+        # i.e. the code simply has fewer listed days); otherwise last=None refetches the full lookback.
+        backfill_before = (datetime.utcnow() - timedelta(days=lookback - 7)).strftime("%Y-%m-%d")
+        ok = (span["n"] >= window_days) | (span["first"].astype(str) <= backfill_before)
+        last = span.loc[ok, "last"].to_dict()
+    with cf.ThreadPoolExecutor(max_workers=max(1, max_workers)) as ex:
+        fresh = [f for f in ex.map(lambda c: _volumes_since(c, last.get(c), lookback), uniq)
+                 if f is not None and len(f)]
+
+    frames = ([cache] if not cache.empty else []) + fresh
+    vols = pd.concat(frames, ignore_index=True) if frames else cache
+    vols = (vols[vols["Date"].astype(str) >= cutoff]
+                .drop_duplicates(subset=["Code","Date"], keep="last")
+                .sort_values(["Code","Date"]))
+    if fresh or len(vols) != n_cached:
         try:
-            df = _yf_download_csv(sym)
-            if "Volume" not in df.columns: continue
-            vol = df.dropna(subset=["Volume"]).tail(window_days)["Volume"].astype(float)
-            if len(vol) == 0: continue
-            adv = float(vol.mean())
-            out.append({"Code": c, "ADV": adv})
+            _write_adv_cache(vols)
         except Exception:
-            continue
-        time.sleep(sleep_sec)
-    return pd.DataFrame(out)
+            pass
+
+    vols = vols[vols["Code"].isin(uniq)]
+    if vols.empty:
+        return pd.DataFrame(columns=["Code","ADV"])
+    adv = vols.groupby("Code", sort=False).tail(window_days).groupby("Code", sort=False)["Volume"].mean()
+    return pd.DataFrame({"Code": adv.index.tolist(), "ADV": adv.to_numpy(dtype=float)})
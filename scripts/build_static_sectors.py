@@ -14,6 +14,7 @@ After generation, your daily pipeline will read only config/sectors_static.csv,
 so there are no network calls for sector info at run time.
 """
 import os, glob, yaml, pandas as pd
+from sectors_static import _canon_codes, _write_csv
 
 # Import resolver if present (from earlier bundles). If missing, user can add it.
 try:
@@ -26,7 +27,7 @@ def _codes_from_universe_csv(path):
     try:
         df=pd.read_csv(path)
         if "Code" in df.columns:
-            return df["Code"].dropna().astype(str).str.upper().tolist()
+            return _canon_codes(df["Code"].dropna()).tolist()
     except Exception: pass
     return []
 
@@ -51,11 +52,23 @@ def _codes_from_recent_data(n=7):
             try:
                 df=pd.read_csv(p)
                 if "Code" in df.columns:
-                    codes.update(df["Code"].dropna().astype(str).str.upper().tolist())
+                    codes.update(_canon_codes(df["Code"].dropna()).tolist())
             except Exception:
                 pass
     return sorted(codes)
 
+def _read_static_map(path="config/sectors_static.csv"):
+    """Existing Code -> Sector rows (Unknowns excluded so they get another try)."""
+    if not os.path.exists(path): return {}
+    try:
+        # All text, no NA parsing: a blank Sector stays "" (not "nan") and ticker NA stays "NA"
+        df=pd.read_csv(path, dtype=str, keep_default_na=False)
+        if "Code" in df.columns and "Sector" in df.columns:
+            pairs=((c.strip().upper(), s.strip()) for c,s in zip(df["Code"], df["Sector"]))
+            return {c: s for c,s in pairs if c and s and s != "Unknown"}
+    except Exception: pass
+    return {}
+
 def main():
     codes=set()
     codes.update(_codes_from_universe_yml())
@@ -67,11 +80,16 @@ def main():
         print("No codes found — populate universe files or run once after first daily job.")
         return
 
-    print(f"Building static sectors for {len(codes)} codes…")
-    df=resolve_sectors(sorted(codes))
-    out=df[["Code","Sector"]].drop_duplicates().sort_values("Code")
+    # Only resolve codes the static map doesn't already know
+    existing=_read_static_map()
+    new_codes=sorted(codes - existing.keys())
+    print(f"Building static sectors for {len(codes)} codes ({len(new_codes)} new)…")
+    df_new=resolve_sectors(new_codes) if new_codes else pd.DataFrame(columns=["Code","Sector"])
+    known=pd.DataFrame({"Code": sorted(codes & existing.keys())})
+    known["Sector"]=known["Code"].map(existing)
+    out=pd.concat([known, df_new[["Code","Sector"]]], ignore_index=True).drop_duplicates().sort_values("Code")
     os.makedirs("config", exist_ok=True)
-    out.to_csv("config/sectors_static.csv", index=False)
+    _write_csv(out, "config/sectors_static.csv")
     print("Wrote config/sectors_static.csv with", len(out), "rows.")
 
 if __name__=="__main__":
@@ -15,15 +15,16 @@ Outputs:
   - data/sectors_unknown_today.csv (tickers you still need to fill)
 """
 
-import os, glob, argparse, concurrent.futures as cf
+import os, heapq, argparse, concurrent.futures as cf
 import pandas as pd
 from datetime import datetime, timezone, timedelta
+from sectors_static import _canon_codes, _write_csv
 
 # Optional Yahoo fetcher (only used if --yahoo flag)
 try:
-    from yahoo_sector import fetch_sector_yahoo
+    from yahoo_sector import fetch_sectors_yahoo
 except Exception:
-    fetch_sector_yahoo = None
+    fetch_sectors_yahoo = None
 
 AWST_OFFSET_HOURS = 8
 def today_awst_date():
@@ -34,7 +35,7 @@ def _read_codes_from_universe_csv(path):
     try:
         df=pd.read_csv(path)
         if "Code" in df.columns:
-            return df["Code"].dropna().astype(str).str.upper().tolist()
+            return _canon_codes(df["Code"].dropna()).tolist()
     except Exception: pass
     return []
 
@@ -55,14 +56,22 @@ def _read_codes_from_universe_yml(path="config/universe.yml"):
     except Exception:
         return []
 
+def _recent_data_files(n, prefixes=("asic_","gross_"), root="data"):
+    """Last n data/{asic,gross}_*.csv by name, from one directory pass (n<=0: all of them)."""
+    if not os.path.isdir(root): return []
+    with os.scandir(root) as it:
+        names=[e.name for e in it if e.name.startswith(prefixes) and e.name.endswith(".csv")]
+    names=heapq.nlargest(n, names) if n > 0 else names
+    return [os.path.join(root, nm) for nm in sorted(names)]
+
 def _read_codes_from_data(days=3):
     codes=set()
-    files=sorted(glob.glob("data/asic_*.csv")+glob.glob("data/gross_*.csv"))[-max(days,0):]
+    files=_recent_data_files(days)
     for p in files:
         try:
             df=pd.read_csv(p)
             if "Code" in df.columns:
-                codes.update(df["Code"].dropna().astype(str).str.upper().tolist())
+                codes.update(_canon_codes(df["Code"].dropna()).tolist())
         except Exception:
             pass
     return sorted(codes)
@@ -93,12 +102,16 @@ def main():
     ap.add_argument("--max-workers", type=int, default=12, help="parallel workers for Yahoo fetch")
     args=ap.parse_args()
 
-    codes=set()
-    codes.update(_read_codes_from_universe_yml())
-    codes.update(_read_codes_from_universe_csv("config/universe_asx20.csv"))
-    codes.update(_read_codes_from_universe_csv("config/universe_asx200.csv"))
+    # Independent file reads -> run them side by side
+    tasks=[(_read_codes_from_universe_yml, ()),
+           (_read_codes_from_universe_csv, ("config/universe_asx20.csv",)),
+           (_read_codes_from_universe_csv, ("config/universe_asx200.csv",))]
     if not args.universe_only:
-        codes.update(_read_codes_from_data(args.days))
+        tasks.append((_read_codes_from_data, (args.days,)))
+    codes=set()
+    with cf.ThreadPoolExecutor(max_workers=len(tasks)) as ex:
+        for fut in [ex.submit(f, *a) for f, a in tasks]:
+            codes.update(fut.result())
 
     codes=sorted(codes)
     if not codes:
@@ -120,29 +133,25 @@ def main():
     print(f"Codes total: {len(codes)} | prefilled: {len(mapping)} | missing: {len(missing)}")
 
     if args.yahoo and missing:
-        if fetch_sector_yahoo is None:
+        if fetch_sectors_yahoo is None:
             print("Yahoo fetcher not available. Install requests or include yahoo_sector.py.")
         else:
-            def task(code):
-                sec=fetch_sector_yahoo(code)
-                return code, sec
-            with cf.ThreadPoolExecutor(max_workers=max(1,args.max_workers)) as ex:
-                for code, sec in ex.map(task, missing):
-                    if sec:
-                        mapping[code]=sec
+            for code, sec in fetch_sectors_yahoo(missing, max_workers=args.max_workers).items():
+                if sec:
+                    mapping[code]=sec
         # recompute missing
         missing=[c for c in codes if c not in mapping]
 
     # Write static CSV (only for the codes in our set)
-    rows=[{"Code":c,"Sector":mapping.get(c, "Unknown")} for c in codes]
+    out=pd.DataFrame({"Code": codes, "Sector": [mapping.get(c, "Unknown") for c in codes]})
     os.makedirs("config", exist_ok=True)
-    pd.DataFrame(rows).to_csv("config/sectors_static.csv", index=False)
-    print(f"Wrote config/sectors_static.csv with {len(rows)} rows. Unknowns: {len([r for r in rows if r['Sector']=='Unknown'])}")
+    _write_csv(out, "config/sectors_static.csv")
+    print(f"Wrote config/sectors_static.csv with {len(out)} rows. Unknowns: {int((out['Sector']=='Unknown').sum())}")
 
     # Log unknowns to help quarterly updates
     if missing:
         os.makedirs("data", exist_ok=True)
-        pd.DataFrame({"Date":[str(today_awst_date())]*len(missing), "Code": missing}).to_csv("data/sectors_unknown_today.csv", index=False)
+        pd.DataFrame({"Date": str(today_awst_date()), "Code": missing}).to_csv("data/sectors_unknown_today.csv", index=False)
         print(f"Logged {len(missing)} unknowns to data/sectors_unknown_today.csv")
 
 if __name__=="__main__":
@@ -1,9 +1,18 @@
 # scripts/history.py
-import os, json, glob
+import os, json, heapq
+import concurrent.futures as cf
 import pandas as pd
 import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
+matplotlib.rcParams["path.simplify_threshold"] = 1.0  # fewer vertices on long line charts
+
+try:  # Arrow reads/writes the history folders (Parquet + CSV); pandas/CSV is the fallback
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except Exception:
+    pa = pacsv = pq = None
 
 DIR_DOCS = "docs"
 DIR_API  = os.path.join(DIR_DOCS, "api")
@@ -42,10 +51,10 @@ def export_api(gross_sig, pos_sig, gross_date, asic_date):
         "asic":  _to_records(pos_sig,   pos_cols),
     }
     # default=str ensures any lingering date/datetime objects serialize cleanly
-    with open(os.path.join(DIR_API, "latest.json"), "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2, default=str)
-    with open(os.path.join(DIR_API_DAILY, f"{gross_date}.json"), "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2, default=str)
+    blob = json.dumps(payload, ensure_ascii=False, indent=2, default=str).encode("utf-8")
+    for p in (os.path.join(DIR_API, "latest.json"), os.path.join(DIR_API_DAILY, f"{gross_date}.json")):
+        with open(p, "wb") as f:
+            f.write(blob)
 
 def append_history(gross_sig, pos_sig, gross_date, asic_date):
     ensure_dirs()
@@ -56,7 +65,7 @@ def append_history(gross_sig, pos_sig, gross_date, asic_date):
             gd["Date"] = gd["Date"].astype(str)
         else:
             gd["Date"] = str(gross_date)
-        gd.to_csv(os.path.join(DIR_HIST_GROSS, f"{gross_date}.csv"), index=False)
+        _write_hist(gd, DIR_HIST_GROSS, gross_date)
 
     if pos_sig is not None and not pos_sig.empty:
         pcols = [c for c in ["Date","Code","PctShort_pp_num","Delta_pp_num","DeltaShares_num","DaysToCover","ADV"]
@@ -66,30 +75,108 @@ def append_history(gross_sig, pos_sig, gross_date, asic_date):
             pdx["Date"] = pdx["Date"].astype(str)
         else:
             pdx["Date"] = str(asic_date)
-        pdx.to_csv(os.path.join(DIR_HIST_ASIC, f"{asic_date}.csv"), index=False)
+        _write_hist(pdx, DIR_HIST_ASIC, asic_date)
 
-def _concat_hist(pattern):
-    files = sorted(glob.glob(pattern))
-    if not files:
-        return pd.DataFrame()
-    frames = []
-    for p in files:
+def _write_hist(df, dirpath, day):
+    """One file per day: Parquet when pyarrow is available, CSV otherwise."""
+    # Categorical Code (from the fetchers) is stored as plain strings so every day's schema concats cleanly
+    cats = [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+    if cats:
+        df = df.astype(dict.fromkeys(cats, object))
+    if pq is not None:
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), os.path.join(dirpath, f"{day}.parquet"),
+                       compression="zstd")
+    else:
+        df.to_csv(os.path.join(dirpath, f"{day}.csv"), index=False)
+
+def hist_files(dirpath, n=None):
+    """Per-day history files in date order (last n days if n). A day's .parquet wins over a .csv."""
+    by_day = {}
+    try:
+        with os.scandir(dirpath) as it:
+            for e in it:
+                day, ext = os.path.splitext(e.name)
+                if ext == ".parquet" or (ext == ".csv" and day not in by_day):
+                    by_day[day] = e.path
+    except FileNotFoundError:
+        return []
+    days = heapq.nlargest(n, by_day) if n else by_day
+    return [by_day[d] for d in sorted(days)]
+
+def _read_hist_table(p, columns):
+    if p.endswith(".parquet"):
+        if columns is not None:
+            columns = [c for c in columns if c in pq.read_schema(p).names]
+        return pq.read_table(p, columns=columns)
+    opts = pacsv.ConvertOptions(column_types={"Date": pa.string(), "Code": pa.string()})
+    t = pacsv.read_csv(p, convert_options=opts)
+    return t if columns is None else t.select([c for c in columns if c in t.column_names])
+
+def _read_hist_table_quiet(p, columns):
+    try:
+        return _read_hist_table(p, columns)
+    except Exception as e:
+        print(f"WARN: history file skipped {p}: {e}")
+        return None
+
+def _map_files(fn, files, columns):
+    """fn(p, columns) over files on a small thread pool (parsing releases the GIL); order kept."""
+    if len(files) < 2:
+        return [fn(p, columns) for p in files]
+    with cf.ThreadPoolExecutor(max_workers=min(8, len(files))) as ex:
+        return list(ex.map(lambda p: fn(p, columns), files))
+
+def read_hist(files, columns=None):
+    """Concat history files into one frame (only `columns` if given). Unreadable files are skipped."""
+    files = list(files)
+    if pa is not None:
         try:
-            frames.append(pd.read_csv(p))
+            tables = [t for t in _map_files(_read_hist_table_quiet, files, columns) if t is not None]
+            return pa.concat_tables(tables, promote_options="permissive").to_pandas() if tables else pd.DataFrame()
         except Exception:
-            continue
-    if not frames:
+            pass
+    # pandas fallback reads both kinds, so the Parquet days aren't dropped along with the Arrow path
+    frames = [f for f in _map_files(_read_file_quiet, files, columns) if f is not None]
+    try:
+        return pd.concat(frames, ignore_index=True, copy=False)
+    except ValueError:  # nothing readable
         return pd.DataFrame()
-    out = pd.concat(frames, ignore_index=True)
+
+def _read_file_quiet(p, columns=None):
+    try:
+        if p.endswith(".parquet"):
+            df = pd.read_parquet(p)
+            return df if columns is None else df[[c for c in columns if c in df.columns]]
+        return pd.read_csv(p, usecols=None if columns is None else (lambda c: c in columns))
+    except Exception as e:
+        print(f"WARN: history file skipped {p}: {e}")
+        return None
+
+def _concat_hist(dirpath, columns=None):
+    files = hist_files(dirpath)
+    if not files:
+        return pd.DataFrame()
+    out = read_hist(files, columns)
+    return out if out.empty else _dedup_hist(out)
+
+_HASH_DEDUP_MIN_ROWS = 50_000
+
+def _dedup_hist(out):
+    """Drop exact duplicate rows (keep last). Large frames dedup on one 64-bit row hash instead of
+    pandas' multi-column path; rows must match on every column either way (venues can share Date+Code)."""
+    if len(out) >= _HASH_DEDUP_MIN_ROWS:
+        return out[~pd.util.hash_pandas_object(out, index=False).duplicated(keep="last").to_numpy()]
     dedup_cols = [c for c in ["Date","Code"] if c in out.columns]
     return out.drop_duplicates(subset=dedup_cols + [c for c in out.columns if c not in dedup_cols], keep="last")
 
 def build_charts():
     ensure_dirs()
     charts = []
+    # One Figure reused for every chart (cleared in between) instead of a pyplot figure per chart
+    fig, ax = plt.subplots(figsize=(8,4.5))
 
     # Gross: top 5 by 30d cumulative
-    gh = _concat_hist(os.path.join(DIR_HIST_GROSS, "*.csv"))
+    gh = _concat_hist(DIR_HIST_GROSS, ["Date","Code","Gross_num"])
     if not gh.empty and "Gross_num" in gh.columns:
         gh["Date"] = pd.to_datetime(gh["Date"], errors="coerce")
         cutoff = pd.Timestamp.today().normalize() - pd.Timedelta(days=30)
@@ -100,14 +187,14 @@ def build_charts():
                     .pivot_table(index="Date", columns="Code", values="Gross_num", aggfunc="sum")
                     .fillna(0))
             if not plot.empty:
-                plt.figure(figsize=(8,4.5)); plot.plot()
-                plt.title("Gross short sales – top 5 (30d)")
-                plt.ylabel("Shares"); plt.xlabel("Date"); plt.tight_layout()
-                p = os.path.join(DIR_CHARTS, "gross_top5_30d.png"); plt.savefig(p); plt.close()
+                ax.clear(); plot.plot(ax=ax)
+                ax.set_title("Gross short sales – top 5 (30d)")
+                ax.set_ylabel("Shares"); ax.set_xlabel("Date"); fig.tight_layout()
+                p = os.path.join(DIR_CHARTS, "gross_top5_30d.png"); fig.savefig(p)
                 charts.append("charts/gross_top5_30d.png")
 
     # ASIC % short leaders (60d)
-    ah = _concat_hist(os.path.join(DIR_HIST_ASIC, "*.csv"))
+    ah = _concat_hist(DIR_HIST_ASIC, ["Date","Code","PctShort_pp_num"])
     if not ah.empty and "PctShort_pp_num" in ah.columns:
         ah["Date"] = pd.to_datetime(ah["Date"], errors="coerce")
         cutoff = pd.Timestamp.today().normalize() - pd.Timedelta(days=60)
@@ -118,12 +205,13 @@ def build_charts():
             plot = ah60[ah60["Code"].isin(latest_codes)].pivot_table(
                 index="Date", columns="Code", values="PctShort_pp_num", aggfunc="last")
             if not plot.empty:
-                plt.figure(figsize=(8,4.5)); plot.plot()
-                plt.title("% short on issue – leaders (60d)")
-                plt.ylabel("Percent"); plt.xlabel("Date"); plt.tight_layout()
-                p = os.path.join(DIR_CHARTS, "asic_pctshort_top5_60d.png"); plt.savefig(p); plt.close()
+                ax.clear(); plot.plot(ax=ax)
+                ax.set_title("% short on issue – leaders (60d)")
+                ax.set_ylabel("Percent"); ax.set_xlabel("Date"); fig.tight_layout()
+                p = os.path.join(DIR_CHARTS, "asic_pctshort_top5_60d.png"); fig.savefig(p)
                 charts.append("charts/asic_pctshort_top5_60d.png")
 
+    plt.close(fig)
     return charts
 
 def update_history_and_charts(gross_sig, pos_sig, gross_date, asic_date):
@@ -137,12 +225,10 @@ def update_history_and_charts(gross_sig, pos_sig, gross_date, asic_date):
             gross_sig["Date"] = gross_sig["Date"].astype(str)
 
     if pos_sig is not None and not pos_sig.empty:
-        for c in ("PctShort_pp","Delta_pp","DeltaShares","DaysToCover","ADV"):
-            if c in pos_sig.columns:
-                pos_sig[c + ("" if c.endswith("_num") else "")] = pos_sig[c]
-        pos_sig["PctShort_pp_num"] = pd.to_numeric(pos_sig.get("PctShort_pp"), errors="coerce").fillna(0.0)
-        pos_sig["Delta_pp_num"]    = pd.to_numeric(pos_sig.get("Delta_pp"),    errors="coerce").fillna(0.0)
-        pos_sig["DeltaShares_num"] = pd.to_numeric(pos_sig.get("DeltaShares"), errors="coerce").fillna(0.0)
+        # *_num columns normally arrive from signals/pipeline already coerced; only fill gaps
+        for c in ("PctShort_pp","Delta_pp","DeltaShares"):
+            if c + "_num" not in pos_sig.columns:
+                pos_sig[c + "_num"] = pd.to_numeric(pos_sig.get(c), errors="coerce").fillna(0.0)
         if "Date" in pos_sig.columns:
             pos_sig["Date"] = pos_sig["Date"].astype(str)
 
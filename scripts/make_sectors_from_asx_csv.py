@@ -16,6 +16,7 @@ If the CSV has only "GICS industry group", we map it to the 11 GICS sectors via
 import os, io, argparse, re
 import pandas as pd
 import requests
+from sectors_static import _canon_codes, _write_csv
 
 PRIMARY  = "https://www.asx.com.au/asx/research/ASXListedCompanies.csv"
 FALLBACK = "https://asx.api.markitdigital.com/asx-research/1.0/companies/list.csv"
@@ -77,7 +78,20 @@ def _download_bytes():
     raise SystemExit("ERROR: Unable to download the ASX list from both endpoints.")
 
 def _decode_best(raw):
-    for enc in ("utf-8-sig","utf-8","utf-16","utf-16le","utf-16be","cp1252"):
+    # Common case: plain UTF-8 (with or without BOM) decodes in one pass
+    try:
+        return raw.decode("utf-8-sig"), "utf-8-sig"
+    except UnicodeDecodeError:
+        pass
+    # Otherwise ask the detector (ships with requests) rather than trial-decoding every codec
+    try:
+        from charset_normalizer import from_bytes
+        best = from_bytes(raw).best()
+        if best is not None and best.encoding:
+            return str(best), best.encoding
+    except Exception:
+        pass
+    for enc in ("utf-16","utf-16le","utf-16be","cp1252"):
         try:
             return raw.decode(enc), enc
         except Exception:
@@ -133,18 +147,12 @@ def _prefer_series(*cands):
             return s
     return None
 
-def _map_industry_group_to_sector(s):
-    if pd.isna(s):
-        return None
-    key = str(s).strip().lower()
-    return INDUSTRY_GROUP_TO_SECTOR.get(key, None)
-
 def _read_universe_csv(path):
     if not os.path.exists(path): return []
     try:
         df = pd.read_csv(path)
         if "Code" in df.columns:
-            return df["Code"].dropna().astype(str).str.upper().str.strip().tolist()
+            return _canon_codes(df["Code"].dropna()).tolist()
     except Exception:
         pass
     return []
@@ -194,14 +202,16 @@ def main():
 
     # Build final table
     out = pd.DataFrame()
-    out["Code"] = df[code_col].astype(str).str.upper().str.strip()
+    out["Code"] = _canon_codes(df[code_col]).fillna("")
 
     if sector_col:
         out["Sector"] = df[sector_col].astype(str).str.strip()
     elif industry_col:
-        mapped = df[industry_col].map(_map_industry_group_to_sector)
+        # normalize the labels once (vectorized) and look them up with a single .map
+        groups = df[industry_col].astype(str).str.strip()
+        mapped = groups.str.lower().map(INDUSTRY_GROUP_TO_SECTOR)
         # if mapping failed, keep the original group label (better than Unknown)
-        out["Sector"] = mapped.where(mapped.notna(), df[industry_col].astype(str).str.strip())
+        out["Sector"] = mapped.where(mapped.notna(), groups)
     else:
         # last resort: create Unknown
         out["Sector"] = "Unknown"
@@ -220,7 +230,7 @@ def main():
 
     os.makedirs("config", exist_ok=True)
     out_path = "config/sectors_static.csv"
-    out.to_csv(out_path, index=False)
+    _write_csv(out, out_path)
     print(f"Wrote {out_path} with {len(out)} rows (source: {used}).")
 
 if __name__ == "__main__":
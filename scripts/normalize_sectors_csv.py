@@ -7,7 +7,7 @@ Usage:
   python scripts/normalize_sectors_csv.py
 """
 import os, pandas as pd
-from sectors_static import _normalize_sector  # reuse logic
+from sectors_static import _normalize_sector_series, _canon_codes, _write_csv  # reuse logic
 
 SRC = "config/sectors_static.csv"
 
@@ -19,10 +19,10 @@ def main():
     if "Code" not in df.columns or "Sector" not in df.columns:
         print("config/sectors_static.csv must have columns: Code,Sector")
         return
-    df["Code"] = df["Code"].astype(str).str.upper().str.strip()
-    df["Sector"] = df["Sector"].astype(str).map(_normalize_sector)
+    df["Code"] = _canon_codes(df["Code"]).fillna("")
+    df["Sector"] = _normalize_sector_series(df["Sector"])
     df = df[df["Code"] != ""].drop_duplicates(subset=["Code"], keep="first").sort_values("Code")
-    df.to_csv(SRC, index=False)
+    _write_csv(df, SRC)
     print(f"Normalized {len(df)} rows and rewrote {SRC}")
 
 if __name__ == "__main__":
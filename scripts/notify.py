@@ -2,13 +2,36 @@
 # Safe to keep or remove. Pipeline will skip if env secrets are unset.
 
 import os, requests
+import concurrent.futures as cf
+import pandas as pd
 
-def _fmt_rows(rows, cols):
-    def _fmt(v):
-        if isinstance(v, float): return f"{v:.2f}"
-        if isinstance(v, int):   return f"{v:,}"
-        return "" if v is None else str(v)
-    return "\n".join([" • " + " | ".join(_fmt(r.get(c)) for c in cols) for r in rows])
+# Missing cells (None / NaN / NA) render as empty text
+def _F2(v):  return "" if pd.isna(v) else f"{v:.2f}"
+def _I0(v):  return "" if pd.isna(v) else f"{v:,.0f}"  # share counts: thousands separators, no decimals
+def _int(v): return "" if pd.isna(v) else f"{v:,}"
+def _txt(v): return "" if pd.isna(v) else str(v)
+# Known message columns -> formatter; anything else falls back to dtype dispatch
+FMTS = {
+    "Code": _txt,
+    "Gross_num": _I0, "PctGrossVsIssuedPct_num": _F2,
+    "PctShort_pp_num": _F2, "Delta_pp_num": _F2, "DeltaShares_num": _F2, "DaysToCover": _F2,
+}
+
+def _fmt_col(s):
+    """Format one column at a time: floats 2dp, ints with thousands separators, rest as text."""
+    f = FMTS.get(s.name)
+    if f is not None: return s.astype(object).map(f)
+    if pd.api.types.is_float_dtype(s):   return s.map(_F2)
+    if pd.api.types.is_integer_dtype(s): return s.astype(object).map(_int)
+    return s.astype(object).map(_txt)
+
+def _fmt_rows(df, cols):
+    if df is None or len(df) == 0: return ""
+    parts = [_fmt_col(df[c]) for c in cols]
+    lines = " • " + parts[0]
+    for p in parts[1:]:
+        lines = lines + " | " + p
+    return "\n".join(lines)
 
 def notify_slack(webhook_url, title, text):
     if not webhook_url: return
@@ -31,32 +54,36 @@ def maybe_notify(ctx, gross_df, pos_df):
     if not (os.getenv("SLACK_WEBHOOK") or os.getenv("NTFY_TOPIC_URL") or (os.getenv("TELEGRAM_BOT_TOKEN") and os.getenv("TELEGRAM_CHAT_ID"))):
         return
 
-    gross_qty = []
+    gross_qty = None
     if gross_df is not None and hasattr(gross_df, "nlargest") and "Gross_num" in gross_df:
-        gross_qty = gross_df.nlargest(5, "Gross_num")[["Code","Gross_num","PctGrossVsIssuedPct_num"]].to_dict(orient="records")
+        gross_qty = gross_df.nlargest(5, "Gross_num")
 
-    pos_spike = []
+    pos_spike = None
     if pos_df is not None and hasattr(pos_df, "sort_values") and "Delta_pp_num" in pos_df:
-        pos_spike = pos_df.sort_values("Delta_pp_num", ascending=False).head(5)[["Code","PctShort_pp_num","Delta_pp_num"]].to_dict(orient="records")
+        pos_spike = pos_df.sort_values("Delta_pp_num", ascending=False).head(5)
 
-    pos_cover = []
+    pos_cover = None
     if pos_df is not None and "DeltaShares_num" in pos_df:
-        pos_cover = pos_df.sort_values("DeltaShares_num", ascending=True).head(5)[["Code","PctShort_pp_num","DeltaShares_num"]].to_dict(orient="records")
+        pos_cover = pos_df.sort_values("DeltaShares_num", ascending=True).head(5)
 
-    pos_dtc = []
+    pos_dtc = None
     if pos_df is not None and "DaysToCover" in pos_df.columns:
-        pos_dtc = pos_df.sort_values("DaysToCover", ascending=False).head(5)[["Code","PctShort_pp_num","DaysToCover"]].to_dict(orient="records")
-
-    def fmt(rows, cols): return _fmt_rows(rows, cols) if rows else ""
+        pos_dtc = pos_df.sort_values("DaysToCover", ascending=False).head(5)
 
     msg = "\n\n".join(filter(None, [
-        f"Gross {ctx['gross_date']} (Top QTY)\n" + fmt(gross_qty, ["Code","Gross_num","PctGrossVsIssuedPct_num"]),
-        f"ASIC {ctx['asic_date']} (Δ pp)\n" + fmt(pos_spike, ["Code","PctShort_pp_num","Delta_pp_num"]),
-        f"ASIC {ctx['asic_date']} (Likely covering)\n" + fmt(pos_cover, ["Code","PctShort_pp_num","DeltaShares_num"]),
-        f"ASIC {ctx['asic_date']} (High DTC)\n" + fmt(pos_dtc, ["Code","PctShort_pp_num","DaysToCover"]),
+        f"Gross {ctx['gross_date']} (Top QTY)\n" + _fmt_rows(gross_qty, ["Code","Gross_num","PctGrossVsIssuedPct_num"]),
+        f"ASIC {ctx['asic_date']} (Δ pp)\n" + _fmt_rows(pos_spike, ["Code","PctShort_pp_num","Delta_pp_num"]),
+        f"ASIC {ctx['asic_date']} (Likely covering)\n" + _fmt_rows(pos_cover, ["Code","PctShort_pp_num","DeltaShares_num"]),
+        f"ASIC {ctx['asic_date']} (High DTC)\n" + _fmt_rows(pos_dtc, ["Code","PctShort_pp_num","DaysToCover"]),
     ]))
 
-    notify_slack(os.getenv("SLACK_WEBHOOK"), "ASX Shorts – Daily", msg)
-    notify_ntfy(os.getenv("NTFY_TOPIC_URL"), "ASX Shorts – Daily", msg)
-    notify_telegram(os.getenv("TELEGRAM_BOT_TOKEN"), os.getenv("TELEGRAM_CHAT_ID"),
-                    "ASX Shorts – Daily", msg)
+    # Post to all configured channels at once; wall time is the slowest one, not the sum
+    title = "ASX Shorts – Daily"
+    jobs = [(notify_slack, (os.getenv("SLACK_WEBHOOK"), title, msg)),
+            (notify_ntfy, (os.getenv("NTFY_TOPIC_URL"), title, msg)),
+            (notify_telegram, (os.getenv("TELEGRAM_BOT_TOKEN"), os.getenv("TELEGRAM_CHAT_ID"), title, msg))]
+    jobs = [(f, a) for f, a in jobs if all(a[:-2])]  # skip channels whose secrets are unset
+    with cf.ThreadPoolExecutor(max_workers=len(jobs)) as ex:
+        futs = [ex.submit(f, *a) for f, a in jobs]
+    for fut in futs:
+        fut.result()  # surface the first failure once every channel has been tried
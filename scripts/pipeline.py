@@ -1,17 +1,20 @@
 # scripts/pipeline.py (static sectors variant)
 
 import os
+import glob
+from itertools import chain
 from datetime import datetime, timedelta, timezone
+import numpy as np
 import pandas as pd
 import yaml
 
-from sources import fetch_asic_short_positions, fetch_asx_gross_shorts, fetch_cboe_gross_shorts
+from sources import fetch_all
 from signals import compute_short_position_signals, compute_gross_shorts_signals
 from render import render_dashboard
 from history import update_history_and_charts
 from adv import fetch_adv
 from scoring import covering_scores
-from sectors_static import load_static_map, attach_sectors_static
+from sectors_static import load_static_map, attach_sectors_static, static_sector_lookup, _mtime_cached
 
 UTC = timezone.utc
 AWST_OFFSET_HOURS = 8  # Perth is UTC+8 (no DST)
@@ -19,42 +22,85 @@ AWST_OFFSET_HOURS = 8  # Perth is UTC+8 (no DST)
 def today_awst():
     return datetime.now(UTC) + timedelta(hours=AWST_OFFSET_HOURS)
 
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)  # libyaml parser when available
+
+@_mtime_cached
 def read_yaml(path):
     with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=_YAML_LOADER)
 
 def save_csv(df, path):
     os.makedirs(os.path.dirname(path), exist_ok=True)
     df.to_csv(path, index=False)
 
-def _safe_top(df, col, n):
+_PREV_ASIC_DTYPES = {"Code": str, "PctShort": "float64", "Issued": "float64"}
+
+def read_prev_asic(path):
+    """Only the columns the Delta calc needs, with fixed dtypes (pyarrow CSV engine, pandas fallback)."""
+    kw = dict(usecols=list(_PREV_ASIC_DTYPES), dtype=_PREV_ASIC_DTYPES)
+    try:
+        return pd.read_csv(path, engine="pyarrow", **kw)
+    except Exception:
+        return pd.read_csv(path, **kw)
+
+def prev_asic_path(asic_date, root="data"):
+    """Newest data/asic_<YYYY-MM-DD>.csv dated before asic_date (one pass by parsed date, no sort)."""
+    dated = []
+    for p in glob.glob(os.path.join(root, "asic_*.csv")):
+        try:
+            dated.append((datetime.strptime(os.path.basename(p)[5:-4], "%Y-%m-%d").date(), p))
+        except ValueError:
+            continue
+    best = max(((d, p) for d, p in dated if d < asic_date), default=None)
+    return best[1] if best else None
+
+def _safe_top(df, col, n, ascending=False):
+    """Top-n rows by numeric col as records (same rows as DataFrame.nlargest(keep="first"); ties in row order).
+    ascending=True gives the n smallest instead. Partial selection with np.partition; only the
+    candidates are sorted and materialized."""
     if df is None or len(df) == 0 or col not in df.columns or n <= 0:
         return []
-    df2 = df.copy()
-    df2[col] = pd.to_numeric(df2[col], errors="coerce")
-    df2 = df2[df2[col].notna()]
-    if df2.empty:
+    s = pd.to_numeric(df[col], errors="coerce")
+    vals = s.to_numpy(dtype=float, na_value=np.nan)
+    if ascending:
+        vals = -vals
+    pos = np.flatnonzero(~np.isnan(vals))
+    if pos.size == 0:
         return []
-    return df2.nlargest(n, col).to_dict(orient="records")
+    if pos.size > n:
+        v = vals[pos]
+        kth = np.partition(v, pos.size - n)[pos.size - n]  # n-th largest value
+        pos = pos[v >= kth]
+    pos = pos[np.argsort(-vals[pos], kind="stable")[:n]]
+    top = df.iloc[pos]
+    if not pd.api.types.is_numeric_dtype(df[col]):
+        top = top.assign(**{col: s.iloc[pos].to_numpy()})
+    return top.to_dict(orient="records")
 
 if __name__ == "__main__":
     cfg = read_yaml("config/alerts.yml") if os.path.exists("config/alerts.yml") else {}
     top_n_pos = cfg.get("short_positions", {}).get("top_n", 25)
 
-    # 1) Gross shorts (T+1)
+    # 0) The three source fetches are independent network calls: run them concurrently
     yday_awst = (today_awst() - timedelta(days=1)).date()
+    asic_fut, asx_fut, cboe_fut = fetch_all(yday_awst)
+
+    # 1) Gross shorts (T+1)
     try:
         asx_df = cboe_df = None
         try:
-            asx_df, _ = fetch_asx_gross_shorts(yday_awst); print(f"INFO: ASX gross {yday_awst}")
+            asx_df, _ = asx_fut.result(); print(f"INFO: ASX gross {yday_awst}")
         except Exception as e:
             print(f"WARN: ASX gross unavailable {yday_awst}: {e}")
         try:
-            cboe_df, _ = fetch_cboe_gross_shorts(yday_awst); print(f"INFO: Cboe gross {yday_awst}")
+            cboe_df, _ = cboe_fut.result(); print(f"INFO: Cboe gross {yday_awst}")
         except Exception as e:
             print(f"WARN: Cboe gross unavailable {yday_awst}: {e}")
         frames = [x for x in (asx_df, cboe_df) if x is not None and len(x)]
         if frames:
+            # One shared category set so the concat keeps Code categorical instead of falling back to object
+            code_dtype = pd.CategoricalDtype(sorted(set().union(*(f["Code"].dropna().unique() for f in frames))))
+            frames = [f.astype({"Code": code_dtype}) for f in frames]
             gross_all = pd.concat(frames, ignore_index=True).drop_duplicates(subset=["Code","Gross","Issued"], keep="last")
             save_csv(gross_all, f"data/gross_{yday_awst}.csv")
         else:
@@ -66,14 +112,14 @@ if __name__ == "__main__":
 
     # 2) Short positions (T+4)
     try:
-        asic_df, _, asic_date = fetch_asic_short_positions(); save_csv(asic_df, f"data/asic_{asic_date}.csv")
+        asic_df, _, asic_date = asic_fut.result(); save_csv(asic_df, f"data/asic_{asic_date}.csv")
     except Exception as e:
         print(f"ERROR: ASIC fetch: {e}"); asic_df = pd.DataFrame(columns=["Code","ReportedShort","Issued","PctShort","Date"]); asic_date = today_awst().date()
 
     prev_df = None
     try:
-        candidates = sorted([p for p in os.listdir("data") if p.startswith("asic_")])
-        if len(candidates) >= 2: prev_df = pd.read_csv(os.path.join("data", candidates[-2]))
+        prev_path = prev_asic_path(asic_date)
+        if prev_path: prev_df = read_prev_asic(prev_path)
     except Exception as e:
         print(f"WARN: prev ASIC not loaded: {e}")
 
@@ -82,7 +128,7 @@ if __name__ == "__main__":
     # 3) ADV & Days-to-Cover
     adv_days = int(cfg.get("short_positions", {}).get("adv_window_days", 30))
     if not pos_sig.empty:
-        codes = sorted(set(pos_sig["Code"].dropna().astype(str).str.upper().tolist()))
+        codes = np.sort(pd.unique(pos_sig["Code"].dropna().astype(str).str.upper())).tolist()
         adv_df = fetch_adv(codes, window_days=adv_days)
         if not adv_df.empty:
             pos_sig = pos_sig.merge(adv_df, on="Code", how="left")
@@ -93,24 +139,27 @@ if __name__ == "__main__":
             pos_sig["DaysToCover"] = 0.0
 
     # 4) Attach static sectors; log unknowns for quarterly upkeep
-    smap = load_static_map()
-    gross_sig = attach_sectors_static(gross_sig, smap, log_path="data/sectors_unknown_today.csv")
-    pos_sig   = attach_sectors_static(pos_sig,   smap, log_path="data/sectors_unknown_today.csv")
+    # One lookup over the union of codes, shared by both frames
+    sector_of = static_sector_lookup((gross_sig, pos_sig), load_static_map(), log_path="data/sectors_unknown_today.csv")
+    gross_sig = attach_sectors_static(gross_sig, sector_of, copy=False)
+    pos_sig   = attach_sectors_static(pos_sig,   sector_of, copy=False)
 
     # 5) Prep panels
+    # signals already built PctShort_pp/Delta_pp/DeltaShares *_num; DaysToCover is float from step 3
     if not pos_sig.empty:
-        pos_sig["PctShort_pp_num"] = pd.to_numeric(pos_sig.get("PctShort_pp"), errors="coerce").fillna(0.0)
-        pos_sig["Delta_pp_num"]    = pd.to_numeric(pos_sig.get("Delta_pp"),    errors="coerce").fillna(0.0)
-        pos_sig["DeltaShares_num"] = pd.to_numeric(pos_sig.get("DeltaShares"), errors="coerce").fillna(0.0)
-        pos_sig["DaysToCover_num"] = pd.to_numeric(pos_sig.get("DaysToCover"), errors="coerce").fillna(0.0)
+        for c in ("PctShort_pp","Delta_pp","DeltaShares","DaysToCover"):
+            if c + "_num" not in pos_sig.columns:
+                s = pos_sig[c]
+                pos_sig[c + "_num"] = (s if pd.api.types.is_numeric_dtype(s) else pd.to_numeric(s, errors="coerce")).fillna(0.0)
 
     gross_top_qty = _safe_top(gross_sig, "Gross_num", cfg.get("gross_shorts", {}).get("top_n", 25))
     gross_top_pct = _safe_top(gross_sig, "PctGrossVsIssuedPct_num", cfg.get("gross_shorts", {}).get("top_n", 25))
 
-    pos_high  = pos_sig.sort_values("PctShort_pp_num", ascending=False).head(top_n_pos).to_dict(orient="records") if not pos_sig.empty else []
-    pos_delta = pos_sig.sort_values("Delta_pp_num",    ascending=False).head(top_n_pos).to_dict(orient="records") if not pos_sig.empty else []
-    pos_cover = pos_sig.sort_values("DeltaShares_num", ascending=True ).head(top_n_pos).to_dict(orient="records") if not pos_sig.empty else []
-    pos_dtc   = pos_sig.sort_values("DaysToCover_num", ascending=False).head(top_n_pos).to_dict(orient="records") if not pos_sig.empty else []
+    # Partial selection per ranking instead of four full sorts of pos_sig
+    pos_high  = _safe_top(pos_sig, "PctShort_pp_num", top_n_pos)
+    pos_delta = _safe_top(pos_sig, "Delta_pp_num",    top_n_pos)
+    pos_cover = _safe_top(pos_sig, "DeltaShares_num", top_n_pos, ascending=True)
+    pos_dtc   = _safe_top(pos_sig, "DaysToCover_num", top_n_pos)
 
     # 6) API, history & charts
     charts = update_history_and_charts(gross_sig, pos_sig, yday_awst, asic_date)
@@ -121,7 +170,7 @@ if __name__ == "__main__":
     cov5_list = cov5.head(top_n_pos).to_dict(orient="records") if not cov5.empty else []
 
     # Render site
-    sectors_on_page = sorted(set([r.get("Sector","Unknown") for r in (gross_top_qty + gross_top_pct + pos_high + pos_delta + pos_cover + pos_dtc) if r.get("Sector")]))
+    sectors_on_page = sorted({r.get("Sector","Unknown") for r in chain(gross_top_qty, gross_top_pct, pos_high, pos_delta, pos_cover, pos_dtc) if r.get("Sector")})
     ctx = {
         "generated_at": today_awst().strftime("%Y-%m-%d %H:%M AWST"),
         "gross_date": yday_awst.strftime("%Y-%m-%d"),
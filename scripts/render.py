@@ -1,17 +1,50 @@
 # scripts/render.py
 from jinja2 import Environment, FileSystemLoader, select_autoescape
-import os
+import os, json, hashlib
+
+# Built once per process; auto_reload=False so renders don't stat() the template each time
+_ENV = Environment(
+    loader=FileSystemLoader("scripts"),
+    autoescape=select_autoescape(["html", "xml"]),
+    auto_reload=False,
+)
+_TPL = None
+
+def _template():
+    global _TPL
+    if _TPL is None:
+        _TPL = _ENV.get_template("template.html")
+    return _TPL
+
+def _ctx_digest(ctx):
+    """Hash of the template source + ctx minus generated_at (the only field that changes every run)."""
+    h = hashlib.blake2b(_ENV.loader.get_source(_ENV, "template.html")[0].encode("utf-8"))
+    data = {k: v for k, v in ctx.items() if k != "generated_at"}
+    h.update(json.dumps(data, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
 
 def render_dashboard(docspath, ctx):
+    """Render docs/index.html unless the data behind it is unchanged since the last render (no git churn /
+    Pages rebuild just for a new timestamp). docs/.content-version holds that data hash."""
     os.makedirs(docspath, exist_ok=True)
-    env = Environment(
-        loader=FileSystemLoader("scripts"),
-        autoescape=select_autoescape(["html", "xml"]),
-    )
-    tpl = env.get_template("template.html")
-    html = tpl.render(**ctx)
-
     with open(os.path.join(docspath, ".nojekyll"), "w", encoding="utf-8") as f:
         f.write("")
-    with open(os.path.join(docspath, "index.html"), "w", encoding="utf-8") as f:
-        f.write(html)
+    path = os.path.join(docspath, "index.html")
+    version_path = os.path.join(docspath, ".content-version")
+    digest = _ctx_digest(ctx)
+    try:
+        with open(version_path, encoding="utf-8") as f:
+            if f.read().strip() == digest and os.path.exists(path):
+                return
+    except OSError:
+        pass
+    tmp = path + ".tmp"
+    try:
+        # Stream straight to disk instead of building the whole page as one string first
+        _template().stream(**ctx).dump(tmp, encoding="utf-8")
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):  # a failed render leaves nothing behind for CI to commit
+            os.remove(tmp)
+    with open(version_path, "w", encoding="utf-8") as f:
+        f.write(digest + "\n")
@@ -1,45 +1,54 @@
 # scripts/scoring.py
 # Compute 3/5-day covering scores from history (ASIC).
 
-import os, glob
+import numpy as np
 import pandas as pd
+from history import hist_files, read_hist
 
 def _load_last_n_history(n=5, path="data/history/asic"):
-    files = sorted(glob.glob(os.path.join(path, "*.csv")))[-n:]
-    frames = []
-    for p in files:
-        try:
-            frames.append(pd.read_csv(p))
-        except Exception:
-            continue
-    if not frames:
+    files = hist_files(path, n)
+    if not files:
         return pd.DataFrame()
-    df = pd.concat(frames, ignore_index=True)
+    df = read_hist(files)
+    if df.empty:
+        return df
+    if "Code" in df.columns:  # a few thousand tickers repeated per day: group on int codes, not strings
+        df["Code"] = df["Code"].astype("category")
     for c in ("DeltaShares_num", "Delta_pp_num", "PctShort_pp_num"):
         if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
+            df[c] = _downcast(pd.to_numeric(df[c], errors="coerce"), c)
     return df
 
+_F32_EXACT_INT = 2 ** 24  # float32 holds every integer up to here
+
+def _downcast(s, col):
+    """float32 halves the bytes the groupby moves, but only where it is lossless: share deltas whose
+    total magnitude is below 2**24, so every value and every per-Code sum is an exact integer.
+    pp columns are fractional and stay float64 (float32 sums leak noise like 0.51026463...)."""
+    if not col.endswith("_pp_num") and s.abs().sum() < _F32_EXACT_INT:
+        return s.astype("float32")
+    return s
+
 def covering_scores(window=3, path="data/history/asic"):
     df = _load_last_n_history(window, path)
     if df.empty or "Code" not in df.columns:
         return pd.DataFrame(columns=["Code","CovNegShares","CovNegPP","NegDays","CoverScore"])
-    df = df.groupby("Code").agg({
-        "DeltaShares_num": lambda s: float(s.clip(upper=0).sum() if s.notna().any() else 0.0),
-        "Delta_pp_num":    lambda s: float(s.clip(upper=0).sum() if s.notna().any() else 0.0),
-        "PctShort_pp_num": "last"
-    }).reset_index()
-    df.rename(columns={"DeltaShares_num":"CovNegShares","Delta_pp_num":"CovNegPP","PctShort_pp_num":"PctShort_pp"}, inplace=True)
-
-    # Neg day count (approximate: count negatives across the window by re-loading with marks)
-    hist = _load_last_n_history(window, path)
-    if not hist.empty and "Code" in hist.columns:
-        negdays = hist.assign(Neg=(hist["DeltaShares_num"] < 0) | (hist["Delta_pp_num"] < 0)).groupby("Code")["Neg"].sum().rename("NegDays")
-        df = df.merge(negdays, on="Code", how="left").fillna({"NegDays":0})
-    else:
-        df["NegDays"] = 0
+    # One load, one groupby: negative parts and the negative-day flag are precomputed columns
+    df = df.assign(
+        NegShares=df["DeltaShares_num"].clip(upper=0),
+        NegPP=df["Delta_pp_num"].clip(upper=0),
+        NegFlag=(df["DeltaShares_num"] < 0) | (df["Delta_pp_num"] < 0),
+    )
+    df = df.groupby("Code", observed=True).agg(
+        CovNegShares=("NegShares", "sum"),
+        CovNegPP=("NegPP", "sum"),
+        PctShort_pp=("PctShort_pp_num", "last"),
+        NegDays=("NegFlag", "sum"),
+    ).reset_index()
+    df = df.astype({c: "float64" for c in ("CovNegShares", "CovNegPP", "PctShort_pp")})
 
     # Combine: more negative sums and more negative days => higher score
     # Use absolute magnitude for sums
-    df["CoverScore"] = (df["NegDays"] * 1.0) + (df["CovNegPP"].abs() * 0.5) + (df["CovNegShares"].abs() / 200000.0)
+    df["CoverScore"] = (df["NegDays"].to_numpy() * 1.0) + (np.abs(df["CovNegPP"].to_numpy()) * 0.5) \
+        + (np.abs(df["CovNegShares"].to_numpy()) / 200000.0)
     return df.sort_values(["CoverScore","CovNegShares","CovNegPP"], ascending=[False, False, False])
@@ -14,17 +14,21 @@ from __future__ import annotations
 import csv
 import os
 import time
+import types
 from dataclasses import dataclass
 from typing import Dict, Iterable, List, Optional
 
 import requests
 import pandas as pd
 
+from sectors_static import _mtime_cached
+from yahoo_sector import fetch_sectors_yahoo
+
 OVERRIDES_CSV = "config/sectors.csv"
 CACHE_CSV     = "data/sectors_cache.csv"
 
 # Normalize Yahoo/various names -> GICS 11 sectors
-SECTOR_NORMALIZE = {
+SECTOR_NORMALIZE = types.MappingProxyType({
     "basic materials": "Materials",
     "materials": "Materials",
     "consumer defensive": "Consumer Staples",
@@ -47,43 +51,46 @@ SECTOR_NORMALIZE = {
     "etf": "ETF/Listed Fund",
     "fund": "ETF/Listed Fund",
     "trust": "ETF/Listed Fund",
-}
+})
+_sector_get = SECTOR_NORMALIZE.get
 
 UA = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124 Safari/537.36"
 
 def _norm_sector(name: Optional[str]) -> Optional[str]:
     if not name:
         return None
-    k = str(name).strip().lower()
-    return SECTOR_NORMALIZE.get(k, name.strip())
+    s = name.strip() if isinstance(name, str) else str(name).strip()
+    v = _sector_get(s.lower())
+    return v if v is not None else s
 
 def _read_overrides(path: str = OVERRIDES_CSV) -> Dict[str, str]:
-    if not os.path.exists(path):
-        return {}
+    return _load_overrides(path)
+
+def _read_cache(path: str = CACHE_CSV) -> Dict[str, str]:
+    return _load_cache(path)
+
+@_mtime_cached
+def _load_overrides(path: str) -> Dict[str, str]:
     try:
         df = pd.read_csv(path)
         # Expect columns: Code,Sector
         if "Code" in df.columns and "Sector" in df.columns:
-            out = {}
-            for _, r in df.iterrows():
-                code = str(r["Code"]).strip().upper()
-                if not code:
-                    continue
-                sec = _norm_sector(r["Sector"])
-                if sec:
-                    out[code] = sec
-            return out
+            df = df[df["Sector"].notna()]
+            codes = df["Code"].fillna("").astype(str).str.strip().str.upper().to_numpy()
+            secs = df["Sector"].map(_norm_sector).to_numpy()
+            return {c: s for c, s in zip(codes, secs) if c and s}
     except Exception:
         pass
     return {}
 
-def _read_cache(path: str = CACHE_CSV) -> Dict[str, str]:
-    if not os.path.exists(path):
-        return {}
+@_mtime_cached
+def _load_cache(path: str) -> Dict[str, str]:
     try:
         df = pd.read_csv(path)
         if "Code" in df.columns and "Sector" in df.columns:
-            return {str(r["Code"]).strip().upper(): str(r["Sector"]).strip() for _, r in df.iterrows() if str(r.get("Sector","")).strip()}
+            codes = df["Code"].fillna("").astype(str).str.strip().str.upper().to_numpy()
+            secs = df["Sector"].fillna("").astype(str).str.strip().to_numpy()
+            return {c: s for c, s in zip(codes, secs) if c and s}
     except Exception:
         pass
     return {}
@@ -93,41 +100,22 @@ def _write_cache(mapping: Dict[str, str], path: str = CACHE_CSV) -> None:
     rows = [{"Code": k, "Sector": v} for k, v in sorted(mapping.items())]
     pd.DataFrame(rows).to_csv(path, index=False)
 
-def _yf_profile_sector(code: str, timeout: int = 15) -> Optional[str]:
-    """Fetch sector from Yahoo Finance quoteSummary modules=assetProfile/summaryProfile"""
-    sym = f"{code}.AX"
-    sess = requests.Session()
-    sess.headers.update({"User-Agent": UA, "Accept": "application/json"})
-    for module in ("assetProfile", "summaryProfile"):
-        url = f"https://query1.finance.yahoo.com/v10/finance/quoteSummary/{sym}?modules={module}"
-        try:
-            r = sess.get(url, timeout=timeout)
-            r.raise_for_status()
-            js = r.json()
-            result = (js or {}).get("quoteSummary", {}).get("result", [])
-            if not result:
-                continue
-            prof = result[0].get(module, {})
-            sec = prof.get("sector")
-            sec = _norm_sector(sec)
-            if sec:
-                return sec
-        except Exception:
-            continue
-    # Some ETFs won't have sector; leave None
-    return None
+def _yahoo_many(codes: List[str], max_workers: int = 16, rate_per_sec: float = 5.0) -> Dict[str, Optional[str]]:
+    """Concurrent, rate-limited Yahoo lookups via yahoo_sector (the one Yahoo client in the repo)."""
+    return fetch_sectors_yahoo(codes, max_workers=max_workers, rate_per_sec=rate_per_sec, timeout=15)
 
-def resolve_sectors(codes: Iterable[str], sleep_sec: float = 0.8) -> pd.DataFrame:
+def resolve_sectors(codes: Iterable[str], rate_per_sec: float = 5.0, max_workers: int = 16) -> pd.DataFrame:
     """
     Resolve sectors for a set of codes and update cache.
     Returns DataFrame: Code, Sector, Source (override/cache/yahoo/unknown)
+    Yahoo lookups run concurrently (max_workers) but start at most rate_per_sec requests per second.
     """
     codes = [str(c).strip().upper() for c in codes if str(c).strip()]
     if not codes:
         return pd.DataFrame(columns=["Code","Sector","Source"])
 
     overrides = _read_overrides()
-    cache = _read_cache()
+    cache = dict(_read_cache())  # updated below with Yahoo hits
     out = {}
     src = {}
 
@@ -144,15 +132,12 @@ def resolve_sectors(codes: Iterable[str], sleep_sec: float = 0.8) -> pd.DataFram
             out[c] = cache[c]; src[c] = "cache"
 
     # 3) yahoo
-    for c in codes:
-        if c in out:
-            continue
-        sec = _yf_profile_sector(c)
-        if sec:
-            out[c] = sec; src[c] = "yahoo"
-            cache[c] = sec
-            # be polite to Yahoo
-            time.sleep(sleep_sec)
+    todo = [c for c in dict.fromkeys(codes) if c not in out]
+    if todo:
+        for c, sec in _yahoo_many(todo, max_workers=max_workers, rate_per_sec=rate_per_sec).items():
+            if sec:
+                out[c] = sec; src[c] = "yahoo"
+                cache[c] = sec
 
     # 4) unknown
     for c in codes:
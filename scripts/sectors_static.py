@@ -10,9 +10,13 @@ Drop-in replacement for your current scripts/sectors_static.py
 """
 
 from __future__ import annotations
+import csv
 import os
+import re
+import numpy as np
 import pandas as pd
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache, wraps
 from typing import Dict
 
 UTC = timezone.utc
@@ -25,92 +29,141 @@ GICS_11 = {
     "Utilities","Real Estate"
 }
 
-# Substring-based mapping from messy labels (including Industry Groups) -> 11 sectors
-def _normalize_sector(s: str) -> str:
-    if not s: return "Unknown"
-    t = str(s).strip()
-    low = t.lower()
-
-    # Already a canonical sector?
-    for canon in GICS_11:
-        if low == canon.lower():
-            return canon
+_GICS_BY_LOWER = {c.lower(): c for c in GICS_11}
+# Attached Sector column: 12 fixed labels stored as small int codes instead of one str object per row
+SECTOR_DTYPE = pd.CategoricalDtype(sorted(GICS_11) + ["Unknown"])
 
+# Keyword mapping from messy labels (including Industry Groups) -> 11 sectors; first match wins
+_SECTOR_PATTERNS = [(sector, re.compile(pat)) for sector, pat in (
     # Real Estate (REITs, management & development, etc.)
-    if ("real estate" in low) or ("reit" in low):
-        return "Real Estate"
-
+    ("Real Estate",            r"real estate|reit"),
     # Communication Services (media, telco)
-    if ("telecommunication" in low) or ("media" in low) or ("communication" in low):
-        return "Communication Services"
-
-    # Information Technology
-    if ("software" in low) or ("technology" in low) or ("semiconductor" in low) or ("hardware" in low) or ("it " in low) or low.startswith("it"):
-        return "Information Technology"
-
-    # Consumer Staples
-    if ("food" in low) or ("beverage" in low) or ("tobacco" in low) or ("staples" in low) or ("household" in low) or ("personal products" in low):
-        return "Consumer Staples"
+    ("Communication Services", r"telecommunication|media|communication"),
+    ("Information Technology", r"software|technology|semiconductor|hardware|it |^it"),
+    ("Consumer Staples",       r"food|beverage|tobacco|staples|household|personal products"),
+    ("Consumer Discretionary", r"retail|automobile|durables|apparel|discretionary|consumer services"),
+    ("Health Care",            r"health|biotech|pharma|life sciences"),
+    ("Financials",             r"bank|insurance|financial|capital markets"),
+    ("Industrials",            r"capital goods|commercial & professional services|transportation|industrial"),
+    ("Materials",              r"materials|metals|mining|chemicals|paper|forest"),
+    ("Energy",                 r"energy|oil|gas|coal|uranium"),
+    ("Utilities",              r"utilit(?:ies|y)"),
+)]
 
-    # Consumer Discretionary
-    if ("retail" in low) or ("automobile" in low) or ("durables" in low) or ("apparel" in low) or ("discretionary" in low) or ("consumer services" in low):
-        return "Consumer Discretionary"
-
-    # Health Care
-    if ("health" in low) or ("biotech" in low) or ("pharma" in low) or ("life sciences" in low):
-        return "Health Care"
-
-    # Financials
-    if ("bank" in low) or ("insurance" in low) or ("financial" in low) or ("diversified financial" in low) or ("capital markets" in low):
-        return "Financials"
-
-    # Industrials
-    if ("capital goods" in low) or ("commercial & professional services" in low) or ("transportation" in low) or ("industrial" in low):
-        return "Industrials"
+def _normalize_sector(s: str) -> str:
+    if not s: return "Unknown"
+    low = str(s).strip().lower()
+    # Already a canonical sector?
+    if low in _GICS_BY_LOWER:
+        return _GICS_BY_LOWER[low]
+    for sector, pat in _SECTOR_PATTERNS:
+        if pat.search(low):
+            return sector
+    # Fallback
+    return "Unknown"
 
-    # Materials
-    if ("materials" in low) or ("metals" in low) or ("mining" in low) or ("chemicals" in low) or ("construction materials" in low) or ("paper" in low) or ("forest" in low):
-        return "Materials"
+def _normalize_sector_series(s: pd.Series) -> pd.Series:
+    """Same as s.astype(str).map(_normalize_sector), but each distinct label is normalized only once."""
+    u = s.astype(str)
+    return u.map({label: _normalize_sector(label) for label in pd.unique(u)})
 
-    # Energy
-    if ("energy" in low) or ("oil" in low) or ("gas" in low) or ("coal" in low) or ("uranium" in low):
-        return "Energy"
+def _canon_codes(s: pd.Series) -> pd.Series:
+    """Trimmed, upper-case ticker codes (missing stays missing). Arrow-backed strings when pyarrow is installed."""
+    try:
+        s = s.astype("string[pyarrow]")
+    except ImportError:
+        s = s.astype("string")
+    return s.str.strip().str.upper()
 
-    # Utilities
-    if "utilities" in low or "utility" in low:
-        return "Utilities"
+_CSV_NEEDS_QUOTES = re.compile(r'[",\r\n]')
 
-    # Fallback
-    return "Unknown"
+def _write_csv(df: pd.DataFrame, path: str) -> None:
+    """Write an all-text frame with pyarrow's C++ CSV writer, byte-identical to df.to_csv(index=False).
+    Falls back to pandas if pyarrow is missing, a column isn't text, or any value would need quoting."""
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+    except ImportError:
+        pacsv = None
+    plain = pacsv is not None and all(
+        not _CSV_NEEDS_QUOTES.search(str(c))
+        and (pd.api.types.is_object_dtype(df[c]) or pd.api.types.is_string_dtype(df[c]))
+        and not df[c].astype("string").str.contains(_CSV_NEEDS_QUOTES.pattern, regex=True).any()
+        for c in df.columns)
+    if not plain:
+        df.to_csv(path, index=False)
+        return
+    with open(path, "wb") as f:
+        f.write((",".join(map(str, df.columns)) + "\n").encode("utf-8"))
+        pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), f,
+                        write_options=pacsv.WriteOptions(include_header=False, quoting_style="none"))
 
 def today_awst_date():
     return (datetime.now(UTC) + timedelta(hours=AWST_OFFSET_HOURS)).date()
 
+def _mtime_cached(loader):
+    """Memoize loader(path) per (path, mtime): editing the file reloads it; callers share (don't mutate) the result."""
+    cached = lru_cache(maxsize=8)(lambda path, mtime: loader(path))
+    @wraps(loader)
+    def load(path):
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        return cached(path, mtime)
+    return load
+
 def load_static_map(path: str = "config/sectors_static.csv") -> Dict[str, str]:
-    if not os.path.exists(path):
-        return {}
+    """Code -> normalized sector."""
+    return _load_static_map_cached(path)
+
+@_mtime_cached
+def _load_static_map_cached(path: str) -> Dict[str, str]:
+    """Two plain text columns: stdlib csv is enough, no DataFrame needed."""
     try:
-        df = pd.read_csv(path)
-        if "Code" in df.columns and "Sector" in df.columns:
-            # Normalize any sector labels from the CSV itself
-            df["Sector"] = df["Sector"].astype(str).map(_normalize_sector)
-            return {str(c).strip().upper(): str(s).strip() for c, s in zip(df["Code"], df["Sector"]) if str(c).strip()}
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            if not {"Code", "Sector"}.issubset(reader.fieldnames or ()):
+                return {}
+            pairs = [((r["Code"] or "").strip().upper(), r["Sector"] or "") for r in reader]
+        # Normalize any sector labels from the CSV itself (once per distinct label)
+        norm = {label: _normalize_sector(label) for label in {s for _, s in pairs}}
+        return {c: norm[s] for c, s in pairs if c}
     except Exception:
         pass
     return {}
 
-def attach_sectors_static(df: pd.DataFrame, static_map: Dict[str, str], log_path: str | None = None) -> pd.DataFrame:
+def attach_sectors_static(df: pd.DataFrame, static_map: Dict[str, str], log_path: str | None = None,
+                          copy: bool = True) -> pd.DataFrame:
+    """Return df with a normalized 'Sector' column. copy=False adds the column to df in place
+    (no full-frame copy) for callers that rebind the result anyway."""
     if df is None or df.empty or "Code" not in df.columns:
         return df
-    out = df.copy()
+    out = df.copy() if copy else df
     codes = out["Code"].astype(str).str.upper()
-    out["Sector"] = codes.map(static_map).fillna("Unknown")
+    found = codes.isin(static_map.keys()).to_numpy()
+    codes = codes.to_numpy()
+    sectors = np.fromiter((static_map.get(c, "Unknown") for c in codes), dtype=object, count=len(codes))
     # Normalize again, in case map contained non-canonical labels
-    out["Sector"] = out["Sector"].astype(str).map(_normalize_sector)
+    out["Sector"] = _normalize_sector_series(pd.Series(sectors, index=out.index)).astype(SECTOR_DTYPE)
 
     if log_path is not None:
-        missing = sorted(set(codes[codes.map(lambda x: x not in static_map)].tolist()))
-        if missing:
-            os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
-            pd.DataFrame({"Date":[str(today_awst_date())]*len(missing), "Code": missing}).to_csv(log_path, index=False)
+        _log_unknown(np.unique(codes[~found]).tolist(), log_path)
     return out
+
+def static_sector_lookup(frames, static_map: Dict[str, str], log_path: str | None = None) -> Dict[str, str]:
+    """Code -> normalized sector for the union of codes across frames, so several frames share one
+    lookup (pass it to attach_sectors_static) and unknown codes are logged once for all of them."""
+    cols = [f["Code"] for f in frames if f is not None and not f.empty and "Code" in f.columns]
+    if not cols:
+        return {}
+    codes = pd.unique(pd.concat(cols, ignore_index=True).astype(str).str.upper())
+    lookup = {c: _normalize_sector(static_map.get(c, "Unknown")) for c in codes}
+    if log_path is not None:
+        _log_unknown(sorted(c for c in codes if c not in static_map), log_path)
+    return lookup
+
+def _log_unknown(missing, log_path: str) -> None:
+    if missing:
+        os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+        pd.DataFrame({"Date":[str(today_awst_date())]*len(missing), "Code": missing}).to_csv(log_path, index=False)
@@ -1,4 +1,5 @@
 # scripts/signals.py
+import numpy as np
 import pandas as pd
 
 _GROSS_BASE_COLS = ["Code", "Gross", "Issued", "PctGrossVsIssuedPct", "Date"]
@@ -7,8 +8,41 @@ _POS_BASE_COLS   = ["Code", "ReportedShort", "Issued", "PctShort", "Date"]
 def _empty_with(cols):
     return pd.DataFrame(columns=cols)
 
-def compute_short_position_signals(df_today, df_prev=None, cfg=None):
-    """ASIC short positions (T+4) with covering flags; DTC computed in pipeline."""
+def _base(df, cols):
+    """New frame with only the input columns the signals use (one narrow copy, not df.copy() of every column)."""
+    return df.reindex(columns=[c for c in cols if c in df.columns])
+
+def _num(s):
+    """Numeric columns pass through as-is (sources already coerced them); anything else is coerced, bad -> NaN."""
+    return s if s is not None and pd.api.types.is_numeric_dtype(s) else pd.to_numeric(s, errors="coerce")
+
+def _pct_to_pp(arr):
+    """(arr in percentage points, scale used). A column whose max is <= 1 holds fractions (x100);
+    otherwise it is already in percent. fmax.reduce skips NaN without an all-NaN warning."""
+    mx = np.fmax.reduce(arr) if arr.size else np.nan
+    scale = 100.0 if (np.isfinite(mx) and mx <= 1) else 1.0
+    return arr * scale, scale
+
+def _sort_desc(df, keys):
+    """df ordered by keys, all descending; same order as sort_values(keys, ascending=False) on these
+    NaN-free flag/number columns (np.lexsort is stable, so ties keep row order). Last key in lexsort is primary."""
+    perm = np.lexsort([-df[k].to_numpy(dtype=float) for k in reversed(keys)])
+    return df.take(perm)
+
+def build_prev_lookup(df_prev):
+    """Previous day's PctShort_prev/Issued_prev indexed by Code (one row per code), or None.
+    Build once and pass as prev_lookup when computing signals against the same prev day repeatedly."""
+    if df_prev is None or not {"Code","PctShort"}.issubset(df_prev.columns):
+        return None
+    prev = (df_prev[["Code","PctShort","Issued"]].drop_duplicates("Code").set_index("Code")
+            .rename(columns={"PctShort":"PctShort_prev","Issued":"Issued_prev"}))
+    prev["PctShort_prev"] = _num(prev["PctShort_prev"])
+    prev["Issued_prev"]   = _num(prev.get("Issued_prev"))
+    return prev
+
+def compute_short_position_signals(df_today, df_prev=None, cfg=None, prev_lookup=None):
+    """ASIC short positions (T+4) with covering flags; DTC computed in pipeline.
+    prev_lookup (from build_prev_lookup) takes precedence over df_prev."""
     cfg = cfg or {}
     t = cfg.get("short_positions", {})
     pct_ge   = float(t.get("pct_short_ge", 5.0))
@@ -24,43 +58,54 @@ def compute_short_position_signals(df_today, df_prev=None, cfg=None):
         ])
         return out
 
-    out = df_today.copy()
-    out["PctShort"] = pd.to_numeric(out["PctShort"], errors="coerce")
-    out["Issued"]   = pd.to_numeric(out.get("Issued"), errors="coerce")
-
-    maxv = out["PctShort"].max()
-    out["PctShort_pp"] = (out["PctShort"] * 100.0) if (pd.notna(maxv) and maxv <= 1) else out["PctShort"]
-
-    if df_prev is not None and {"Code","PctShort"}.issubset(df_prev.columns):
-        prev = df_prev[["Code","PctShort","Issued"]].rename(columns={"PctShort":"PctShort_prev","Issued":"Issued_prev"})
-        prev["PctShort_prev"] = pd.to_numeric(prev["PctShort_prev"], errors="coerce")
-        prev["Issued_prev"]   = pd.to_numeric(prev.get("Issued_prev"), errors="coerce")
-        out = out.merge(prev, on="Code", how="left")
-        if pd.notna(maxv) and maxv <= 1:
-            out["Delta_pp"] = (out["PctShort"] - out["PctShort_prev"]) * 100.0
-        else:
-            out["Delta_pp"] = (out["PctShort"] - out["PctShort_prev"])
+    out = _base(df_today, _POS_BASE_COLS)
+    out["PctShort"] = _num(out["PctShort"])
+    out["Issued"]   = _num(out.get("Issued"))
+
+    # Plain float arrays from here on instead of a chain of Series ops (each allocating a new Series)
+    nan = np.nan
+    pct = out["PctShort"].to_numpy(dtype=float, na_value=nan)
+    iss = out["Issued"].to_numpy(dtype=float, na_value=nan)
+    pp, scale = _pct_to_pp(pct)
+    out["PctShort_pp"] = pp
+
+    if prev_lookup is None:
+        prev_lookup = build_prev_lookup(df_prev)
+    has_prev = prev_lookup is not None
+    if has_prev:
+        # Code is the key: hash join on the indexed prev frame (left join keeps row order)
+        out = out.join(prev_lookup, on="Code", how="left", validate="m:1")
+
+    shorted = pp / 100.0 * iss
+    if has_prev:
+        pct_prev = out["PctShort_prev"].to_numpy(dtype=float, na_value=nan)
+        prev_shorted = pct_prev / 100.0 * out["Issued_prev"].to_numpy(dtype=float, na_value=nan)
+        delta_pp = (pct - pct_prev) * scale
+        delta_sh = shorted - prev_shorted
     else:
-        out["PctShort_prev"] = pd.NA
-        out["Issued_prev"]   = pd.NA
-        out["Delta_pp"]      = pd.NA
-
-    out["ShortedShares"]      = (out["PctShort_pp"] / 100.0) * out["Issued"]
-    out["PrevShortedShares"]  = (pd.to_numeric(out.get("PctShort_prev"), errors="coerce") / 100.0) * out.get("Issued_prev")
-    out["DeltaShares"]        = out["ShortedShares"] - out["PrevShortedShares"]
-
-    out["PctShort_pp_num"] = pd.to_numeric(out["PctShort_pp"], errors="coerce").fillna(0.0)
-    out["Delta_pp_num"]    = pd.to_numeric(out["Delta_pp"],    errors="coerce").fillna(0.0)
-    out["DeltaShares_num"] = pd.to_numeric(out["DeltaShares"], errors="coerce").fillna(0.0)
-
-    out["FLAG_high_pct"] = out["PctShort_pp_num"] >= pct_ge
-    out["FLAG_delta"]    = out["Delta_pp_num"]    >= dpp_ge
-
-    out["FLAG_cover_pp"]     = out["Delta_pp_num"]    <= (-dpp_ge)
-    out["FLAG_cover_shares"] = out["DeltaShares_num"] <= (-dshr_ge)
-    out["CoverScore"]        = out[["FLAG_cover_pp","FLAG_cover_shares"]].sum(axis=1, min_count=1)
-
-    return out.sort_values(["FLAG_high_pct","FLAG_delta","PctShort_pp_num"], ascending=[False, False, False])
+        delta_pp = delta_sh = np.full(len(out), nan)
+    pp_num = np.where(np.isnan(pp), 0.0, pp)
+    dpp_num = np.where(np.isnan(delta_pp), 0.0, delta_pp)
+    dsh_num = np.where(np.isnan(delta_sh), 0.0, delta_sh)
+    cover_pp = dpp_num <= (-dpp_ge)
+    cover_sh = dsh_num <= (-dshr_ge)
+
+    cols = {}
+    if has_prev:
+        cols.update(Delta_pp=delta_pp, ShortedShares=shorted, PrevShortedShares=prev_shorted, DeltaShares=delta_sh)
+    else:
+        cols.update(PctShort_prev=pd.NA, Issued_prev=pd.NA, Delta_pp=pd.NA,
+                    ShortedShares=shorted, PrevShortedShares=pd.NA, DeltaShares=pd.NA)
+    cols.update(
+        PctShort_pp_num=pp_num, Delta_pp_num=dpp_num, DeltaShares_num=dsh_num,
+        FLAG_high_pct=pp_num >= pct_ge, FLAG_delta=dpp_num >= dpp_ge,
+        FLAG_cover_pp=cover_pp, FLAG_cover_shares=cover_sh,
+        CoverScore=cover_pp.astype("int64") + cover_sh,
+    )
+    for k, v in cols.items():
+        out[k] = v
+
+    return _sort_desc(out, ["FLAG_high_pct","FLAG_delta","PctShort_pp_num"])
 
 def compute_gross_shorts_signals(df_asx_cboe, cfg=None):
     cfg = cfg or {}
@@ -69,15 +114,15 @@ def compute_gross_shorts_signals(df_asx_cboe, cfg=None):
         out = _empty_with(_GROSS_BASE_COLS + ["FLAG_big_qty","FLAG_big_pct","Score","Gross_num","PctGrossVsIssuedPct_num"])
         return out
 
-    out = df_asx_cboe.copy()
-    out["Gross"] = pd.to_numeric(out.get("Gross"), errors="coerce")
-    out["Issued"] = pd.to_numeric(out.get("Issued"), errors="coerce")
-    out["PctGrossVsIssuedPct"] = pd.to_numeric(out.get("PctGrossVsIssuedPct"), errors="coerce").fillna(0.0)
+    out = _base(df_asx_cboe, _GROSS_BASE_COLS)
+    out["Gross"] = _num(out.get("Gross"))
+    out["Issued"] = _num(out.get("Issued"))
+    out["PctGrossVsIssuedPct"] = _num(out.get("PctGrossVsIssuedPct")).fillna(0.0)
     out["Gross_num"] = out["Gross"].fillna(0.0)
-    out["PctGrossVsIssuedPct_num"] = out["PctGrossVsIssuedPct"].fillna(0.0)
+    out["PctGrossVsIssuedPct_num"] = out["PctGrossVsIssuedPct"]  # already filled above
 
     out["FLAG_big_qty"] = out["Gross_num"] >= float(t.get("absolute_qty_ge", 200_000))
     out["FLAG_big_pct"] = out["PctGrossVsIssuedPct_num"] >= float(t.get("as_percent_issued_ge", 0.10))
     out["Score"] = out[["FLAG_big_qty","FLAG_big_pct"]].sum(axis=1, min_count=1)
 
-    return out.sort_values(["Score","Gross_num","PctGrossVsIssuedPct_num"], ascending=[False,False,False])
+    return _sort_desc(out, ["Score","Gross_num","PctGrossVsIssuedPct_num"])
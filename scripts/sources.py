@@ -1,110 +1,316 @@
 # scripts/sources.py
 # Robust: built-in retry, compute % Issued = Gross/Issued*100, ignore vendor % fields.
 
-import io, re, calendar, time
+import io, os, re, csv, json, codecs, time, random
+import concurrent.futures as cf
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 import requests
+import numpy as np
 import pandas as pd
 
+try:  # Arrow's C++ CSV reader for the vendor files; pandas is the fallback
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except Exception:
+    pa = pacsv = pq = None
+
 UTC = timezone.utc
 
 def _dstr(d): return d.strftime("%Y%m%d")
-def _mon3(d): return calendar.month_abbr[d.month].lower()
+# Fixed English abbreviations as used in the ASX URL path (calendar.month_abbr follows the locale)
+_MON3 = ("", "jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+def _mon3(d): return _MON3[d.month]
+
+# One pooled session for all source fetches: TLS/keep-alive reused across lookback days and retries
+_SESSION = requests.Session()
+_SESSION.headers.update({"Accept-Encoding": "gzip, deflate"})
+for _scheme in ("https://", "http://"):
+    _SESSION.mount(_scheme, requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0))
+_sget = _SESSION.get
+
+_RETRY_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+
+def _retryable(e):
+    """Network errors, timeouts and transient HTTP statuses are worth retrying; other HTTP errors
+    (404 and friends) fail fast since the file won't appear on retry."""
+    if isinstance(e, requests.HTTPError):
+        return getattr(e.response, "status_code", None) in _RETRY_STATUS
+    return isinstance(e, (requests.ConnectionError, requests.Timeout))
 
-def _get(url, retries=6, backoff_sec=10, timeout=30):
-    last_err = None
+def _get(url, retries=4, backoff_sec=1, max_backoff_sec=30, timeout=30):
+    """GET with exponential backoff + full jitter between attempts, retrying only transient failures."""
     for attempt in range(retries):
         try:
-            r = requests.get(url, timeout=timeout)
+            r = _sget(url, timeout=timeout)
             r.raise_for_status()
             return r
         except Exception as e:
-            last_err = e
-            if attempt == retries - 1:
+            if attempt == retries - 1 or not _retryable(e):
                 raise
-            time.sleep(backoff_sec * (attempt + 1))
-    raise last_err
+            time.sleep(random.uniform(0, min(max_backoff_sec, backoff_sec * 2 ** attempt)))
+
+def _head_missing(url, timeout=10):
+    """True only when a probe says the file isn't there (4xx other than 405/416/429). Servers that refuse
+    HEAD (405/501) get a 1 KB ranged GET instead, streamed and closed so a Range-ignoring 200 doesn't pull
+    the whole file. Any other answer, or no answer, returns False so the caller falls through to the GET."""
+    try:
+        code = _SESSION.head(url, timeout=timeout, allow_redirects=True).status_code
+        if code in (405, 501):
+            with _SESSION.get(url, headers={"Range": "bytes=0-1023"}, timeout=timeout, stream=True) as r:
+                code = r.status_code
+    except Exception:
+        return False
+    return 400 <= code < 500 and code not in (405, 416, 429)
+
+# Per-day response cache: reruns for the same report date skip the network entirely
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "asxshortalert")
+CACHE_MAX_AGE_SEC = 24 * 3600
+
+def _cache_path(source, d, ext):
+    return os.path.join(CACHE_DIR, f"{source}_{_dstr(d)}{ext}")
+
+def _cache_fresh(path):
+    try:
+        return time.time() - os.path.getmtime(path) < CACHE_MAX_AGE_SEC
+    except OSError:
+        return False
+
+def _cache_write(path, data):
+    """Best effort: a read-only or full disk just means no cache."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+def _get_day(source, d, url, ext, transcode=True):
+    """Body for one source/day, from the disk cache when fresh, else downloaded and cached.
+    transcode: decode with the response charset (as r.text would) and keep UTF-8, so cached bytes need no header."""
+    path = _cache_path(source, d, ext)
+    if _cache_fresh(path):
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            pass
+    r = _get(url)
+    body = r.content
+    if transcode:
+        enc = r.encoding or r.apparent_encoding or "utf-8"
+        if codecs.lookup(enc).name not in ("utf-8", "ascii"):
+            body = body.decode(enc, "replace").encode("utf-8")
+    _cache_write(path, body)
+    return body
+
+def cache_as_parquet(df, path):
+    """Persist a parsed frame as zstd Parquet (typed, columnar) so a reload skips parsing and coercion.
+    Best effort; needs pyarrow."""
+    if pq is None or df is None:
+        return
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp, compression="zstd")
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+def _cached_frame(source, d):
+    """The parsed frame cached for source/day if fresh, else None."""
+    path = _cache_path(source, d, ".parquet")
+    if pq is None or not _cache_fresh(path):
+        return None
+    try:
+        return pq.read_table(path).to_pandas()
+    except Exception:
+        return None
+
+def _read_csv_bytes(data, encoding="utf-8", dtypes=None, usecols=None):
+    """CSV bytes -> DataFrame via pyarrow (multi-threaded, typed columns), pandas if that fails.
+    dtypes ({column: "int64" | "float64" | "string"}) are applied by Arrow at parse time instead of being inferred;
+    names not in the file are ignored. A value that doesn't fit its type sends the read to the untyped
+    pandas path, so callers still coerce non-numeric columns. usecols (names, in file order) limits the
+    columns materialized by either reader."""
+    if pacsv is not None:
+        try:
+            conv = pacsv.ConvertOptions(column_types={c: pa.type_for_alias(t) for c, t in (dtypes or {}).items()},
+                                        include_columns=usecols)
+            tbl = pacsv.read_csv(io.BytesIO(data), read_options=pacsv.ReadOptions(encoding=encoding),
+                                 convert_options=conv)
+            for i, f in enumerate(tbl.schema):  # keep date-like text as text, as pandas does
+                if pa.types.is_temporal(f.type):
+                    tbl = tbl.set_column(i, f.name, tbl.column(i).cast(pa.string()))
+            return tbl.to_pandas()
+        except Exception:
+            pass
+    return pd.read_csv(io.BytesIO(data), encoding=encoding, usecols=usecols)
+
+def _coerce_numeric(df, cols):
+    """In place: columns the typed read already parsed as numbers are left alone; only text columns
+    (the untyped fallback after a stray value) are coerced, bad -> NaN."""
+    for c in cols:
+        if c in df.columns and not pd.api.types.is_numeric_dtype(df[c]):
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+
+def _categorize_code(df):
+    """In place: Code as a categorical (a few thousand short tickers, heavily repeated across joins)."""
+    if "Code" in df.columns:
+        df["Code"] = df["Code"].astype("category")
+
+_ASIC_COLS = {
+    "Product Code": "Code",
+    "Reported Short Positions": "ReportedShort",
+    "Total Product in Issue": "Issued",
+    "% of Total Product in Issue Reported as Short Positions": "PctShort",  # percent units
+}
+# Counts as int64 (as pandas infers them; nulls still come back as float64), the percentage as float64
+_ASIC_DTYPES = {"Product Code": "string", "Reported Short Positions": "int64", "Total Product in Issue": "int64",
+                "% of Total Product in Issue Reported as Short Positions": "float64"}
 
 def fetch_asic_short_positions(today_utc=None, max_lookback_days=8):
     """Find latest ASIC Short Positions CSV (T+4). Keep '% short' as numeric percent."""
     if today_utc is None: today_utc = datetime.now(UTC)
-    for extra in range(0, max_lookback_days):
-        d = (today_utc - timedelta(days=4 + extra))
-        url = f"https://download.asic.gov.au/short-selling/RR{_dstr(d)}-001-SSDailyAggShortPos.csv"
+    days = [today_utc - timedelta(days=4 + extra) for extra in range(0, max_lookback_days)]
+    urls = [f"https://download.asic.gov.au/short-selling/RR{_dstr(d)}-001-SSDailyAggShortPos.csv" for d in days]
+    known = _asic_latest_known(days)
+    # A run in the last day already found `known`: only the days newer than it still need probing
+    # (ASIC may have published since); the known day is tried next and older ones are skipped
+    n_probe = len(days) if known is None else days.index(known)
+    # Probe those days at once (one round trip instead of one per day), then GET newest-first
+    with cf.ThreadPoolExecutor(max_workers=max(1, n_probe)) as ex:
+        missing = list(ex.map(_head_missing, urls[:n_probe]))
+    missing += [d != known for d in days[n_probe:]]
+    for d, url, miss in zip(days, urls, missing):
+        if miss:  # skip days with no file without paying the GET retry/backoff
+            continue
         try:
-            csv = _get(url).text
-            df = pd.read_csv(io.StringIO(csv))
+            df = _cached_frame("asic", d)
+            if df is not None:
+                return df, url, d.date()
+            df = _read_csv_bytes(_get_day("asic", d, url, ".csv"), dtypes=_ASIC_DTYPES)
             df.columns = [c.strip() for c in df.columns]
-            df.rename(columns={
-                "Product Code": "Code",
-                "Reported Short Positions": "ReportedShort",
-                "Total Product in Issue": "Issued",
-                "% of Total Product in Issue Reported as Short Positions": "PctShort",  # percent units
-            }, inplace=True)
+            df.rename(columns=_ASIC_COLS, inplace=True)
+            _categorize_code(df)
             df["Date"] = d.date()
-            for c in ("ReportedShort","Issued","PctShort"):
-                if c in df.columns:
-                    df[c] = pd.to_numeric(df[c], errors="coerce")
+            _coerce_numeric(df, ("ReportedShort","Issued","PctShort"))
+            cache_as_parquet(df, _cache_path("asic", d, ".parquet"))
+            if d != known:  # new or newer day: record it for the next run
+                _cache_write(os.path.join(CACHE_DIR, "asic_latest.json"), json.dumps({"date": _dstr(d)}).encode())
             return df, url, d.date()
         except Exception:
             continue
     raise RuntimeError("ASIC CSV not found in expected window.")
 
+def _asic_latest_known(days):
+    """The day in `days` that a recent run found as the newest ASIC file (and whose body is cached), else None."""
+    path = os.path.join(CACHE_DIR, "asic_latest.json")
+    if not _cache_fresh(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            ds = json.load(f)["date"]
+    except Exception:
+        return None
+    return next((d for d in days if _dstr(d) == ds and _cache_fresh(_cache_path("asic", d, ".csv"))), None)
+
+# Matched with finditer over the whole report. Every separator str.splitlines() breaks on is first mapped
+# to "\n", so ^/$ see the same lines as before; fields are split on [ \t] (the only ASCII \s left inside
+# a line) and the (?u:[^\S\n]) edge runs stand in for strip(), so a match never spans lines. Header/blank/page
+# lines fail at the first character inside the regex engine instead of costing a Python-level call each.
+_LINE_BREAKS = str.maketrans(dict.fromkeys("\r\v\f\x1c\x1d\x1e\x85\u2028\u2029", "\n"))
+_ASX_LINE = re.compile(
+    r"^(?u:[^\S\n])*(?P<Code>[A-Z0-9]{2,4})[ \t]+(?P<Name>.+?)[ \t]+"
+    r"(?P<Class>ETF UNITS|CDI 1:1|CDI 3:1|FPO|STAPLED|FPO NZX|FPO NZ)[ \t]+"
+    r"(?P<Gross>[\d,]+)[ \t]+(?P<Issued>[\d,]+)[ \t]+[\.\d]+(?u:[^\S\n])*$",  # vendor % matched, not captured
+    re.ASCII | re.MULTILINE,  # ASCII feed: byte-wise \d classes; ^/$ at each line
+)
+_ASX_COLS = list(_ASX_LINE.groupindex)
+
 def fetch_asx_gross_shorts(target_date):
     """ASX text (T+1). Compute PctGrossVsIssuedPct = Gross/Issued*100."""
     y, mon3 = target_date.year, _mon3(target_date)
     url = f"https://asxonline.com/content/dam/asxonline/public/reports/{y}/{mon3}/shortsell_gross_{_dstr(target_date)}.txt"
-    txt = _get(url).text
-    lines = [ln.strip() for ln in txt.splitlines()]
-    pat = re.compile(
-        r"^(?P<Code>[A-Z0-9]{2,4})\s+(?P<Name>.+?)\s+"
-        r"(?P<Class>ETF UNITS|CDI 1:1|CDI 3:1|FPO|STAPLED|FPO NZX|FPO NZ)\s+"
-        r"(?P<Gross>[\d,]+)\s+(?P<Issued>[\d,]+)\s+(?P<Pct>[\.\d]+)$"
-    )
-    rows = []
-    for ln in lines:
-        m = pat.match(ln)
-        if m: rows.append(m.groupdict())
-    df = pd.DataFrame(rows)
+    df = _cached_frame("asx", target_date)
+    if df is not None:
+        return df, url
+    txt = _get_day("asx", target_date, url, ".txt").decode("utf-8", "replace")
+    # One regex scan over the whole text; only matching lines become rows
+    df = pd.DataFrame([m.groups() for m in _ASX_LINE.finditer(txt.translate(_LINE_BREAKS))], columns=_ASX_COLS)
     if df.empty:
         return df, url
-    df["Gross"] = pd.to_numeric(df["Gross"].str.replace(",",""), errors="coerce")
-    df["Issued"] = pd.to_numeric(df["Issued"].str.replace(",",""), errors="coerce")
-    df["PctGrossVsIssuedPct"] = (df["Gross"] / df["Issued"]) * 100.0
-    df.drop(columns=[c for c in ["Pct"] if c in df.columns], inplace=True)
+    _categorize_code(df)
+    for c in ("Gross", "Issued"):
+        digits = df[c].str.replace(",", "", regex=False)
+        try:  # digits and commas only, so a plain int64 cast almost always works
+            df[c] = digits.astype("int64")
+        except ValueError:  # a bare "," strips to "": coerce that row to NaN, keep the rest
+            df[c] = pd.to_numeric(digits, errors="coerce")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df["PctGrossVsIssuedPct"] = np.divide(df["Gross"].to_numpy(), df["Issued"].to_numpy(), dtype="float64") * 100.0
     df["Date"] = target_date
+    cache_as_parquet(df, _cache_path("asx", target_date, ".parquet"))
     return df, url
 
-def _find_col(df, key_snippets):
-    lower_map = {c.lower(): c for c in df.columns}
-    for snip in key_snippets:
-        for low, orig in lower_map.items():
-            if snip in low:
-                return orig
-    return None
+def _find_col(lower_map, key_snippets):
+    """First column whose lower-cased name contains a snippet; snippets are tried in priority order.
+    lower_map is {lower-cased name: original name}, built once by the caller."""
+    return next((orig for snip in key_snippets for low, orig in lower_map.items() if snip in low), None)
+
+@lru_cache(maxsize=64)
+def _resolve_cboe_cols(columns):
+    """(code, gross, issued) column names for a Cboe header tuple; the header rarely changes day to day."""
+    lower_map = {c.lower(): c for c in columns}
+    return (_find_col(lower_map, ["code"]),
+            _find_col(lower_map, ["reported gross short sales", "gross short"]),
+            _find_col(lower_map, ["issued capital"]))
 
 def fetch_cboe_gross_shorts(target_date):
     """Cboe AU CSV (T+1). Compute PctGrossVsIssuedPct = Gross/Issued*100; ignore vendor %."""
     url = f"https://cdn.cboe.com/data/au/equities/short_sale_reports/Short_Sell_{_dstr(target_date)}.csv"
-    csv = _get(url).text
-    header_idx = None
-    lines = csv.splitlines()
-    for i, ln in enumerate(lines):
-        if ln.strip().startswith("Code,"):
-            header_idx = i; break
-    if header_idx is None:
-        raise ValueError("Cboe CSV header not found")
-
-    df = pd.read_csv(io.StringIO("\n".join(lines[header_idx:])))
-    code_col   = _find_col(df, ["code"])
-    gross_col  = _find_col(df, ["reported gross short sales", "gross short"])
-    issued_col = _find_col(df, ["issued capital"])
+    df = _cached_frame("cboe", target_date)
+    if df is not None:
+        return df, url
+    body = _get_day("cboe", target_date, url, ".csv", transcode=False)  # read as UTF-8 bytes, as before
+    # Preamble lines precede the "Code,..." header: one C-level search instead of splitting into lines
+    if body.startswith(b"\xef\xbb\xbf"):  # UTF-8 BOM
+        body = body[3:]
+    if body.startswith(b"Code,"):
+        start = 0
+    else:
+        start = body.find(b"\nCode,") + 1
+        if start == 0:
+            raise ValueError("Cboe CSV header not found")
+
+    # Resolve the columns from the header line first so the parse can type them up front
+    end = body.find(b"\n", start)
+    header = next(csv.reader([body[start:end if end >= 0 else None].decode("utf-8", "replace").rstrip("\r")]))
+    code_col, gross_col, issued_col = _resolve_cboe_cols(tuple(header))
     if not all([code_col, gross_col, issued_col]):
         raise KeyError("Cboe CSV column names changed; could not map")
 
+    # Only the three mapped columns are parsed; names, vendor % and the rest are never materialized
+    keep = (code_col, gross_col, issued_col)
+    df = _read_csv_bytes(body[start:], dtypes={code_col: "string", gross_col: "int64", issued_col: "int64"},
+                         usecols=[c for c in dict.fromkeys(header) if c in keep])
+
     df = df.rename(columns={code_col:"Code", gross_col:"Gross", issued_col:"Issued"})
-    df["Gross"] = pd.to_numeric(df["Gross"], errors="coerce")
-    df["Issued"] = pd.to_numeric(df["Issued"], errors="coerce")
+    _categorize_code(df)
+    _coerce_numeric(df, ("Gross","Issued"))
     df["PctGrossVsIssuedPct"] = (df["Gross"] / df["Issued"]) * 100.0
     df["Date"] = target_date
+    cache_as_parquet(df, _cache_path("cboe", target_date, ".parquet"))
     return df, url
+
+def fetch_all(target_date, today_utc=None):
+    """Run the ASIC, ASX and Cboe fetches concurrently on the shared session.
+    Returns completed futures (asic, asx, cboe): .result() gives each fetcher's usual return value or
+    re-raises its error, so one failed source doesn't stop the others."""
+    with cf.ThreadPoolExecutor(max_workers=3) as ex:
+        return (ex.submit(fetch_asic_short_positions, today_utc),
+                ex.submit(fetch_asx_gross_shorts, target_date),
+                ex.submit(fetch_cboe_gross_shorts, target_date))
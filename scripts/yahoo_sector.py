@@ -1,8 +1,14 @@
 # scripts/yahoo_sector.py
-import requests, time, random
+import requests, threading, time, types
+import concurrent.futures as cf
+
+try:  # orjson decodes the Yahoo payloads faster when installed; stdlib json otherwise (both take bytes)
+    from orjson import loads as _json_loads
+except Exception:
+    from json import loads as _json_loads
 
 UA = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124 Safari/537.36"
-SECTOR_NORMALIZE = {
+SECTOR_NORMALIZE = types.MappingProxyType({
     "basic materials":"Materials","materials":"Materials",
     "consumer defensive":"Consumer Staples","consumer staples":"Consumer Staples",
     "consumer cyclical":"Consumer Discretionary","consumer discretionary":"Consumer Discretionary",
@@ -15,30 +21,67 @@ SECTOR_NORMALIZE = {
     "real estate":"Real Estate",
     "utilities":"Utilities",
     "etf":"ETF/Listed Fund","fund":"ETF/Listed Fund","trust":"ETF/Listed Fund"
-}
+})
+_sector_get = SECTOR_NORMALIZE.get
+
 def _norm_sector(name):
     if not name: return None
-    k=str(name).strip().lower()
-    return SECTOR_NORMALIZE.get(k, str(name).strip())
+    s=name.strip() if isinstance(name, str) else str(name).strip()
+    v=_sector_get(s.lower())
+    return v if v is not None else s
+
+# One keep-alive session for every lookup (build scripts call this once per code)
+_SESSION=requests.Session()
+_SESSION.headers.update({"User-Agent": UA, "Accept":"application/json"})
+_SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=16))
+
+# With httpx[http2] installed, the batch multiplexes its concurrent lookups over one HTTP/2 connection
+# instead of one HTTP/1.1 connection per worker; requests is used otherwise (httpx isn't a requirement)
+try:
+    import httpx
+    _H2_CLIENT=httpx.Client(http2=True, headers={"User-Agent": UA, "Accept":"application/json"})
+except Exception:
+    _H2_CLIENT=None
 
-def fetch_sector_yahoo(code, timeout=12):
-    """Return normalized sector or None; single request; polite headers."""
+class _RateLimiter:
+    """Thread-safe spacing of request starts: at most `rate` per second across all workers."""
+    def __init__(self, rate):
+        self.interval=1.0/rate if rate > 0 else 0.0
+        self._next=0.0
+        self._lock=threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now=time.monotonic()
+            start=max(now, self._next)
+            self._next=start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+def fetch_sector_yahoo(code, timeout=12, session=None, limiter=None):
+    """Return normalized sector or None; single request (both profile modules at once); polite headers."""
     sym=f"{code}.AX"
-    sess=requests.Session()
-    sess.headers.update({"User-Agent": UA, "Accept":"application/json"})
+    sess=session or _H2_CLIENT or _SESSION
+    url=f"https://query1.finance.yahoo.com/v10/finance/quoteSummary/{sym}?modules=assetProfile,summaryProfile"
+    try:
+        if limiter is not None: limiter.wait()
+        r=sess.get(url, timeout=timeout)
+        r.raise_for_status()
+        js=_json_loads(r.content)
+        res=(js or {}).get("quoteSummary",{}).get("result",[])
+    except Exception:
+        return None
+    if not res: return None
     for module in ("assetProfile","summaryProfile"):
-        url=f"https://query1.finance.yahoo.com/v10/finance/quoteSummary/{sym}?modules={module}"
-        try:
-            r=sess.get(url, timeout=timeout)
-            r.raise_for_status()
-            js=r.json()
-            res=(js or {}).get("quoteSummary",{}).get("result",[])
-            if not res: continue
-            prof=res[0].get(module,{}) or {}
-            sec=_norm_sector(prof.get("sector"))
-            if sec: return sec
-        except Exception:
-            # backoff a touch on transient errors
-            time.sleep(0.1 + random.random()*0.2)
-            continue
+        prof=res[0].get(module,{}) or {}
+        sec=_norm_sector(prof.get("sector"))
+        if sec: return sec
     return None
+
+def fetch_sectors_yahoo(codes, max_workers=16, rate_per_sec=5.0, timeout=12):
+    """{code: sector or None} for many codes; lookups run concurrently over the shared session, but a
+    shared rate limiter starts at most rate_per_sec of them per second."""
+    codes=list(dict.fromkeys(codes))
+    limiter=_RateLimiter(rate_per_sec)
+    with cf.ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(codes) or 1))) as ex:
+        return dict(zip(codes, ex.map(lambda c: fetch_sector_yahoo(c, timeout=timeout, limiter=limiter), codes)))